@@ -1,8 +1,11 @@
 # app.py  (Streamlit UI)
-import os, re, io, requests, pandas as pd, streamlit as st
+import os, re, time, requests, streamlit as st
+from itertools import islice
 from ui_helpers import init_flags, detect_country, apply_paid_visibility, footer_identity, owner_badge, watermark_css
+from export_helpers import iter_ndjson
 
 BACKEND_URL = os.getenv("BACKEND_URL") or st.secrets.get("BACKEND_URL","http://localhost:8001")
+JOB_POLL_MAX_SEC = float(os.getenv("JOB_POLL_MAX_SEC", "600"))  # give up on a bulk job that stops making progress
 
 st.set_page_config(page_title="Search It — Pro", layout="wide")
 
@@ -10,35 +13,40 @@ def valid_email(x:str)->bool:
     return bool(x and re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$"))
 
 # ===== Helpers (UI) =====
-def to_dataframe(results):
-    rows=[]
+def job_preview(job_id, n=25):
+    # first records of a finished job for the on-page preview; the rest stays on the backend
+    with requests.get(f"{BACKEND_URL}/v1/jobs/{job_id}/results", stream=True, timeout=30) as rr:
+        rr.raise_for_status()
+        return list(islice(iter_ndjson(rr.iter_lines()), n))
+
+def resolve_links(results):
+    # one /resolve_batch call per result page instead of one /resolve call per result
+    dois = []
     for w in results:
-        title = w.get("title") or w.get("display_name") or ""
-        doi = w.get("doi","")
-        year = (w.get("publication_year") or "")
-        venue = ((w.get("primary_location") or {}).get("source") or {}).get("display_name","")
-        rows.append({"Title": title, "Year": year, "Venue": venue, "DOI": doi})
-    return pd.DataFrame(rows)
+        doi = (w.get("doi") or "").replace("https://doi.org/","")
+        if doi and not (w.get("open_access") or {}).get("oa_url"): dois.append(doi)
+    if not dois: return {}
+    try:
+        r = requests.post(f"{BACKEND_URL}/resolve_batch", json={"dois": dois}, timeout=20)
+        if r.ok: return r.json().get("results", {})
+    except Exception:
+        pass
+    return {}
 
-def get_best_pdf_and_source(w):
+def get_best_pdf_and_source(w, resolved=None):
     doi = (w.get("doi") or "").replace("https://doi.org/","")
     pdf = (w.get("open_access") or {}).get("oa_url") or ""
     source = ((w.get("primary_location") or {}).get("source") or {}).get("url") or ""
     if not source and doi:
         source = f"https://doi.org/{doi}"
     if (not pdf) and doi:
-        try:
-            r = requests.get(f"{BACKEND_URL}/resolve", params={"doi": doi}, timeout=8)
-            if r.ok:
-                j = r.json()
-                pdf = j.get("oa_pdf_url") or pdf
-                if not source: source = j.get("publisher_landing_url") or source
-        except Exception:
-            pass
+        j = (resolved or {}).get(doi) or {}
+        pdf = j.get("oa_pdf_url") or pdf
+        if not source: source = j.get("publisher_landing_url") or source
     return pdf, source
 
-def actions_row(w):
-    pdf, source = get_best_pdf_and_source(w)
+def actions_row(w, resolved=None):
+    pdf, source = get_best_pdf_and_source(w, resolved)
     parts=[]
     if pdf: parts.append(f'<a title="PDF" href="{pdf}" target="_blank">⬇ PDF</a>')
     if source: parts.append(f'<a title="From Source" href="{source}" target="_blank">↗ From Source</a>')
@@ -54,13 +62,14 @@ def actions_row(w):
 
 def render_results(results):
     st.write(f"**Results shown:** {len(results)}")
+    resolved = resolve_links(results)
     for w in results:
         title = (w.get("title") or "Untitled").strip()
         authors = ", ".join([ (a.get("author") or {}).get("display_name","") for a in (w.get("authorships") or []) ][:5])
         year = w.get("publication_year") or ""
         st.markdown(f"### {title}")
         st.caption(f"{authors} · {year}")
-        st.markdown(actions_row(w), unsafe_allow_html=True)
+        st.markdown(actions_row(w, resolved), unsafe_allow_html=True)
         st.divider()
     helpme_modal()
     services_modal()
@@ -206,7 +215,7 @@ if st.button("🔎 Search / ابحث"):
         st.info("بعد أول نتيجة ناجحة يطلب النظام بريدك لضمان حصتك المستقرة. "
                 "فضلاً أدخل بريدك أعلاه. / Email is required after the first successful search.")
     else:
-        params = {"q": q, "per_page": 25}
+        params = {"q": q, "per_page": 25, "fields": "list"}
         if st.session_state.user_email: params["user_mailto"] = st.session_state.user_email
         r = requests.get(f"{BACKEND_URL}/v1/search", params=params, timeout=30)
         if r.ok:
@@ -225,21 +234,40 @@ if st.button("🔎 Search / ابحث"):
             else:
                 st.error(f"API error {r.status_code}: {r.text}")
 
-# ---------- Fetch 2000 & Download ----------
-if st.button("⬇ Fetch up to 2000 & Download Excel"):
+# ---------- Fetch 2000 & Export (file is built by the backend; the UI only passes it through) ----------
+EXPORT_EXT = {"xlsx": "xlsx", "csv": "csv", "ris": "ris", "bibtex": "bib", "parquet": "parquet"}
+exp_fmt = st.selectbox("Export format", list(EXPORT_EXT), index=0)
+if st.button("⬇ Fetch up to 2000 & Export"):
     if not can_search_now():
         st.info("Email is required after first success. / مطلوب بريدك بعد أول نجاح.")
     else:
-        params = {"q": q or "", "target_count": 2000}
+        params = {"q": q or "", "target_count": 2000, "fields": "list"}
         if st.session_state.user_email: params["user_mailto"] = st.session_state.user_email
-        r = requests.get(f"{BACKEND_URL}/v1/search_bulk", params=params, timeout=120)
+        # background job on the backend: poll its progress instead of holding one long request open
+        r = requests.post(f"{BACKEND_URL}/v1/jobs/bulk", data=params, timeout=30)
         if r.ok:
-            results = r.json().get("results", [])
-            st.success(f"Fetched {len(results)} records.")
-            df = to_dataframe(results)
-            bio = io.BytesIO(); df.to_excel(bio, index=False, engine="openpyxl"); bio.seek(0)
-            st.download_button("Download Excel (2000)", bio.getvalue(), file_name="results_2000.xlsx")
-            render_results(results[:25])
+            job = r.json()
+            bar, deadline = st.progress(0.0, text="Fetching…"), time.monotonic() + JOB_POLL_MAX_SEC
+            while job.get("status") in ("queued", "running") and time.monotonic() < deadline:
+                time.sleep(1)
+                job = requests.get(f"{BACKEND_URL}/v1/jobs/{job['id']}", timeout=10).json()
+                bar.progress(job.get("progress", 0.0), text=f"Fetched {job.get('fetched', 0)} records…")
+            if job.get("status") == "done":
+                rr = requests.get(f"{BACKEND_URL}/v1/jobs/{job['id']}/export", params={"format": exp_fmt}, timeout=300)
+                head = job_preview(job["id"]) if rr.ok else []
+                requests.delete(f"{BACKEND_URL}/v1/jobs/{job['id']}", timeout=10)  # the file is in hand; free the disk
+                if rr.ok:
+                    st.success(f"Fetched {job.get('fetched', 0)} records.")
+                    st.download_button(f"Download {exp_fmt.upper()}", rr.content, file_name=f"results_2000.{EXPORT_EXT[exp_fmt]}",
+                                       mime=rr.headers.get("content-type"))
+                    render_results(head)
+                else:
+                    st.error(f"Export error: {rr.status_code} {rr.text}")
+            elif job.get("status") in ("queued", "running"):
+                requests.delete(f"{BACKEND_URL}/v1/jobs/{job['id']}", timeout=10)
+                st.error(f"Bulk job still {job['status']} after {JOB_POLL_MAX_SEC:.0f} s; cancelled. Try a narrower query.")
+            else:
+                st.error(f"Bulk job {job.get('status')}: {job.get('error') or ''}")
         else:
             st.error(f"Error: {r.status_code} {r.text}")
 
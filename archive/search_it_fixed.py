@@ -18,6 +18,7 @@ import math
 import requests
 import pandas as pd
 import streamlit as st
+from local_search import apply_exclude
 
 # ---------------- إعدادات افتراضية/تحميل إعدادات ----------------
 DEFAULT_CONFIG = {
@@ -205,33 +206,9 @@ def _build_pdf_and_source_urls(w):
         source_url = f"https://doi.org/{source_url}"
     return pdf_url, source_url
 
-def _reconstruct_abstract(inv_index):
-    """OpenAlex يعيد abstract_inverted_index كقائمة مقلوبة؛ نعيد بناء الملخص كنص."""
-    if not inv_index or not isinstance(inv_index, dict):
-        return ""
-    pos_to_word = {}
-    max_pos = 0
-    for word, positions in inv_index.items():
-        for p in positions:
-            pos_to_word[p] = word
-            if p > max_pos: max_pos = p
-    return " ".join(pos_to_word.get(i, "") for i in range(max_pos+1)).strip()
-
 def _apply_exclude(items, none_words):
-    if not none_words: 
-        return items
-    excl = [x.strip().lower() for x in none_words.split(",") if x.strip()]
-    if not excl:
-        return items
-    filtered = []
-    for w in items:
-        title = (w.get("title") or "").lower()
-        abstract = _reconstruct_abstract(_field(w, "abstract_inverted_index") or {}).lower()
-        # استبعد إن وُجدت أي كلمة محظورة في العنوان أو الملخّص
-        if any(x and ((x in title) or (x in abstract)) for x in excl):
-            continue
-        filtered.append(w)
-    return filtered
+    # استبعد إن وُجدت أي كلمة محظورة في العنوان أو الملخّص (الكلمات مفصولة بفواصل)
+    return apply_exclude(items, none_words, sep=",")
 
 def render_actions_row_custom(w, ui_lang, content_lang, q, exact_phrase, any_words, CFG):
     pdf_url, source_url = _build_pdf_and_source_urls(w)
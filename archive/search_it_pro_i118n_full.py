@@ -17,6 +17,7 @@ Features:
 
 import io, os, re, json, requests, pandas as pd, streamlit as st
 from urllib.parse import quote
+from local_search import apply_local_filters as _apply_local_filters, bm25_rank as _bm25_rank
 
 # ---------------- UI languages ----------------
 LANGS = [
@@ -56,6 +57,9 @@ def make_T():
         "sort_new": "Newest",
         "sort_cited": "Most cited",
         "strict_local": "Semantic local filter (smart match)",
+        "local_rank": "Local BM25 re-ranking",
+        "title_weight": "Title weight",
+        "rank_terms": "Re-rank terms (blank = query)",
         "semantic_ext": "External semantic search (optional)",
         "provider": "Provider",
         "api_key": "API Key",
@@ -102,6 +106,9 @@ def make_T():
         "sort_new": "الأحدث",
         "sort_cited": "الأكثر استشهادًا",
         "strict_local": "البحث الدلالي المحلي (تطابق ذكي)",
+        "local_rank": "إعادة ترتيب محلية (BM25)",
+        "title_weight": "وزن العنوان",
+        "rank_terms": "كلمات إعادة الترتيب (فارغ = كلمة البحث)",
         "semantic_ext": "البحث الدلالي الخارجي (اختياري)",
         "provider": "المزوِّد",
         "api_key": "مفتاح API",
@@ -147,6 +154,9 @@ def make_T():
         "sort_new": "Plus récent",
         "sort_cited": "Le plus cité",
         "strict_local": "Filtre sémantique local (pertinence intelligente)",
+        "local_rank": "Reclassement local BM25",
+        "title_weight": "Poids du titre",
+        "rank_terms": "Termes de reclassement (vide = requête)",
         "semantic_ext": "Recherche sémantique externe (optionnelle)",
         "provider": "Fournisseur",
         "api_key": "Clé API",
@@ -235,6 +245,10 @@ with st.expander(t(st.session_state.ui_lang,'adv_search'), expanded=False):
         sort_opt     = st.selectbox(t(st.session_state.ui_lang,'sort'),
                                     [t(st.session_state.ui_lang,'sort_rel'), t(st.session_state.ui_lang,'sort_new'), t(st.session_state.ui_lang,'sort_cited')], index=0)
         strict_local = st.checkbox(t(st.session_state.ui_lang,'strict_local'), value=True)
+        # ranking knobs stay out of the search signature: changing them re-ranks the fetched batch locally
+        local_rank   = st.checkbox(t(st.session_state.ui_lang,'local_rank'), value=False)
+        title_weight = st.slider(t(st.session_state.ui_lang,'title_weight'), 1.0, 5.0, 2.0, 0.5)
+        rank_terms   = st.text_input(t(st.session_state.ui_lang,'rank_terms'), value="")
 
     st.markdown("---")
     st.subheader(t(st.session_state.ui_lang,'semantic_ext'))
@@ -257,49 +271,8 @@ def _field(o, path, d=None):
             return d
     return cur
 
-def _reconstruct_abstract(inv_index):
-    if not inv_index or not isinstance(inv_index, dict): return ""
-    pos_to_word={}; mx=-1
-    for w,positions in inv_index.items():
-        for p in positions:
-            pos_to_word[p]=w; mx=max(mx,p)
-    return " ".join(pos_to_word.get(i,"") for i in range(mx+1)).strip() if mx>=0 else ""
-
 def _ok(s): return bool(re.search(r'[A-Za-z0-9\u0600-\u06FF]', (s or "")))
 
-def _tokenize(text):
-    if not text: return []
-    return [t for t in re.split(r'[\s,;:،؛]+', text.strip()) if t]
-
-def _apply_exclude(items, none_words):
-    if not none_words: return items
-    excl = [x.strip().lower() for x in re.split(r'[,\s]+', none_words) if x.strip()]
-    out = []
-    for w in items:
-        title = (w.get("title") or "").lower()
-        abstract = _reconstruct_abstract(_field(w, "abstract_inverted_index") or {}).lower()
-        if any(x and (x in title or x in abstract) for x in excl):
-            continue
-        out.append(w)
-    return out
-
-def _apply_require(items, q, exact_phrase, any_words, enabled=True):
-    if not enabled: return items
-    req_tokens = []
-    if q: req_tokens.extend(_tokenize(q))
-    if exact_phrase: req_tokens.append(exact_phrase.strip())
-    any_list = [w.strip() for w in any_words.split(",") if w.strip()] if any_words else []
-    out = []
-    for w in items:
-        text = ((w.get("title") or "") + " " +
-                _reconstruct_abstract(_field(w, "abstract_inverted_index") or ""))
-        t = text.lower()
-        ok_all = all(tok.lower() in t for tok in req_tokens) if req_tokens else True
-        ok_any = any((aw.lower() in t) for aw in any_list) if any_list else True
-        if ok_all and ok_any:
-            out.append(w)
-    return out
-
 def _build_params(q, exact_phrase, any_words, author, venue, result_lang, years, open_access_only, doc_type, sort_opt, title_only):
     params, search_terms = {}, []
     if _ok(q):             search_terms.append(q.strip())
@@ -601,8 +574,7 @@ if do_search and q.strip():
     params = _build_params(**{k:params_for_sig[k] for k in ["q","exact_phrase","any_words","author","venue","result_lang","years","open_access_only","doc_type","sort_opt","title_only"]})
     raw_results, nxt_cursor, total = fetch_up_to(params, st.session_state.cursor, target_count=500)
     # local filters
-    raw_results = _apply_exclude(raw_results, locals().get("none_words",""))
-    raw_results = _apply_require(raw_results, params_for_sig["q"], params_for_sig["exact_phrase"], params_for_sig["any_words"], enabled=params_for_sig["strict_local"])
+    raw_results = _apply_local_filters(raw_results, params_for_sig["q"], params_for_sig["exact_phrase"], params_for_sig["any_words"], locals().get("none_words",""), enabled=params_for_sig["strict_local"])
     st.session_state.page_results = raw_results
     st.session_state.cursor = nxt_cursor
     st.session_state.total_count = total
@@ -613,13 +585,16 @@ else:
 
 # Render page results + paging
 if st.session_state.page_results:
-    display_page(st.session_state.page_results)
+    shown = st.session_state.page_results
+    if locals().get("local_rank"):
+        shown = _bm25_rank(shown, locals().get("rank_terms") or " ".join([q, params_for_sig["exact_phrase"], params_for_sig["any_words"]]),
+                           title_weight=locals().get("title_weight", 2.0))
+    display_page(shown)
     if st.session_state.cursor:
         if st.button(t(st.session_state.ui_lang,"next_page")):
             params = _build_params(**{k:params_for_sig[k] for k in ["q","exact_phrase","any_words","author","venue","result_lang","years","open_access_only","doc_type","sort_opt","title_only"]})
             raw_results, nxt_cursor, total = fetch_up_to(params, st.session_state.cursor, target_count=500)
-            raw_results = _apply_exclude(raw_results, locals().get("none_words",""))
-            raw_results = _apply_require(raw_results, params_for_sig["q"], params_for_sig["exact_phrase"], params_for_sig["any_words"], enabled=params_for_sig["strict_local"])
+            raw_results = _apply_local_filters(raw_results, params_for_sig["q"], params_for_sig["exact_phrase"], params_for_sig["any_words"], locals().get("none_words",""), enabled=params_for_sig["strict_local"])
             st.session_state.page_results = raw_results
             st.session_state.cursor = nxt_cursor
             st.session_state.total_count = total
@@ -18,6 +18,7 @@ import requests
 import pandas as pd
 import streamlit as st
 from urllib.parse import quote
+from local_search import apply_local_filters as _apply_local_filters, bm25_rank as _bm25_rank
 
 # ---------------- إعدادات عامّة ----------------
 LANGS = [
@@ -189,6 +190,10 @@ with st.expander(t("adv_search", st.session_state.ui_lang), expanded=False):
         years        = st.slider("المدى الزمني", 1990, 2030, (1990, 2030))
         sort_opt     = st.selectbox("الترتيب", ["الصلة (افتراضي)","الأحدث","الأكثر استشهادًا"], index=0)
         strict_local = st.checkbox("🧲 البحث الدلالي المحلي (تطابق ذكي)", value=True)
+        # عناصر الترتيب خارج توقيع البحث: تغييرها يعيد ترتيب الدفعة المجلوبة محليًا دون طلب جديد
+        local_rank   = st.checkbox("🏅 إعادة ترتيب محلية (BM25)", value=False)
+        title_weight = st.slider("وزن العنوان", 1.0, 5.0, 2.0, 0.5)
+        rank_terms   = st.text_input("كلمات إعادة الترتيب (فارغ = كلمة البحث)", value="")
 
 # ---------------- أدوات طلب OpenAlex ----------------
 def _ok(s): 
@@ -203,55 +208,6 @@ def _field(obj, path, default=None):
             return default
     return cur
 
-def _reconstruct_abstract(inv_index):
-    if not inv_index or not isinstance(inv_index, dict):
-        return ""
-    pos_to_word = {}
-    max_pos = -1
-    for word, positions in inv_index.items():
-        for p in positions:
-            pos_to_word[p] = word
-            max_pos = max(max_pos, p)
-    return " ".join(pos_to_word.get(i, "") for i in range(max_pos+1)).strip() if max_pos >= 0 else ""
-
-def _tokenize(text):
-    if not text: return []
-    return [t for t in re.split(r'[\s,;:،؛]+', text.strip()) if t]
-
-def _apply_exclude(items, none_words):
-    if not none_words: 
-        return items
-    excl = [x.strip().lower() for x in re.split(r'[,\s]+', none_words) if x.strip()]
-    if not excl:
-        return items
-    filtered = []
-    for w in items:
-        title = (w.get("title") or "").lower()
-        abstract = _reconstruct_abstract(_field(w, "abstract_inverted_index") or {}).lower()
-        if any(x and ((x in title) or (x in abstract)) for x in excl):
-            continue
-        filtered.append(w)
-    return filtered
-
-def _apply_require(items, q, exact_phrase, any_words, enabled=True):
-    if not enabled:
-        return items
-    req_tokens = []
-    if q: req_tokens.extend(_tokenize(q))
-    if exact_phrase: req_tokens.append(exact_phrase.strip())
-    any_list = [w.strip() for w in any_words.split(",") if w.strip()] if any_words else []
-
-    out = []
-    for w in items:
-        text = ((w.get("title") or "") + " " +
-                _reconstruct_abstract(_field(w, "abstract_inverted_index") or ""))
-        t = text.lower()
-        ok_all = all(tok.lower() in t for tok in req_tokens) if req_tokens else True
-        ok_any = any((aw.lower() in t) for aw in any_list) if any_list else True
-        if ok_all and ok_any:
-            out.append(w)
-    return out
-
 def _build_params(q, exact_phrase, any_words, author, venue, lang_code, years, open_access_only, doc_type, sort_opt, title_only):
     params, search_terms = {}, []
     if _ok(q):             search_terms.append(q.strip())
@@ -336,8 +292,7 @@ if do_search and q.strip():
     params = _build_params(**{k:params_for_sig[k] for k in ["q","exact_phrase","any_words","author","venue","lang_code","years","open_access_only","doc_type","sort_opt","title_only"]})
     raw_results, nxt_cursor, total = fetch_up_to(params, st.session_state.cursor, target_count=500)
     # فلترة محلية
-    raw_results = _apply_exclude(raw_results, params_for_sig["any_words"]*0 + locals().get("none_words",""))  # trick to keep mypy calm
-    raw_results = _apply_require(raw_results, params_for_sig["q"], params_for_sig["exact_phrase"], params_for_sig["any_words"], enabled=params_for_sig["strict_local"])
+    raw_results = _apply_local_filters(raw_results, params_for_sig["q"], params_for_sig["exact_phrase"], params_for_sig["any_words"], params_for_sig["any_words"]*0 + locals().get("none_words",""), enabled=params_for_sig["strict_local"])  # trick to keep mypy calm
     st.session_state.page_results = raw_results
     st.session_state.cursor = nxt_cursor
     st.session_state.total_count = total
@@ -582,14 +537,17 @@ def display_results(results):
 
 # ---------------- التنفيذ ----------------
 if st.session_state.page_results:
-    display_results(st.session_state.page_results)
+    shown = st.session_state.page_results
+    if locals().get("local_rank"):
+        shown = _bm25_rank(shown, locals().get("rank_terms") or " ".join([q, params_for_sig["exact_phrase"], params_for_sig["any_words"]]),
+                           title_weight=locals().get("title_weight", 2.0))
+    display_results(shown)
     # زر التالي أسفل الصفحة
     if st.session_state.cursor:
         if st.button(t("next_page", st.session_state.ui_lang)):
             params = _build_params(**{k:params_for_sig[k] for k in ["q","exact_phrase","any_words","author","venue","lang_code","years","open_access_only","doc_type","sort_opt","title_only"]})
             raw_results, nxt_cursor, total = fetch_up_to(params, st.session_state.cursor, target_count=500)
-            raw_results = _apply_exclude(raw_results, locals().get("none_words",""))
-            raw_results = _apply_require(raw_results, params_for_sig["q"], params_for_sig["exact_phrase"], params_for_sig["any_words"], enabled=params_for_sig["strict_local"])
+            raw_results = _apply_local_filters(raw_results, params_for_sig["q"], params_for_sig["exact_phrase"], params_for_sig["any_words"], locals().get("none_words",""), enabled=params_for_sig["strict_local"])
             st.session_state.page_results = raw_results
             st.session_state.cursor = nxt_cursor
             st.session_state.total_count = total
@@ -15,6 +15,7 @@ import requests
 import pandas as pd
 import streamlit as st
 from urllib.parse import quote
+from local_search import apply_local_filters as _apply_local_filters
 
 # ---------------- إعدادات عامّة ----------------
 LANGS = [
@@ -176,55 +177,6 @@ def _field(obj, path, default=None):
             return default
     return cur
 
-def _reconstruct_abstract(inv_index):
-    if not inv_index or not isinstance(inv_index, dict):
-        return ""
-    pos_to_word = {}
-    max_pos = -1
-    for word, positions in inv_index.items():
-        for p in positions:
-            pos_to_word[p] = word
-            max_pos = max(max_pos, p)
-    return " ".join(pos_to_word.get(i, "") for i in range(max_pos+1)).strip() if max_pos >= 0 else ""
-
-def _tokenize(text):
-    if not text: return []
-    return [t for t in re.split(r'[\s,;:،؛]+', text.strip()) if t]
-
-def _apply_exclude(items, none_words):
-    if not none_words: 
-        return items
-    excl = [x.strip().lower() for x in re.split(r'[,\s]+', none_words) if x.strip()]
-    if not excl:
-        return items
-    filtered = []
-    for w in items:
-        title = (w.get("title") or "").lower()
-        abstract = _reconstruct_abstract(_field(w, "abstract_inverted_index") or {}).lower()
-        if any(x and ((x in title) or (x in abstract)) for x in excl):
-            continue
-        filtered.append(w)
-    return filtered
-
-def _apply_require(items, q, exact_phrase, any_words, enabled=True):
-    if not enabled:
-        return items
-    req_tokens = []
-    if q: req_tokens.extend(_tokenize(q))
-    if exact_phrase: req_tokens.append(exact_phrase.strip())
-    any_list = [w.strip() for w in any_words.split(",") if w.strip()] if any_words else []
-
-    out = []
-    for w in items:
-        text = ((w.get("title") or "") + " " +
-                _reconstruct_abstract(_field(w, "abstract_inverted_index") or ""))
-        t = text.lower()
-        ok_all = all(tok.lower() in t for tok in req_tokens) if req_tokens else True
-        ok_any = any((aw.lower() in t) for aw in any_list) if any_list else True
-        if ok_all and ok_any:
-            out.append(w)
-    return out
-
 def _build_params(q, exact_phrase, any_words, author, venue, lang_code, years, open_access_only, doc_type, sort_opt, title_only):
     params, search_terms = {}, []
     if _ok(q):             search_terms.append(q.strip())
@@ -290,8 +242,7 @@ if do_search and q.strip():
 
     # فلترة محلية ذكية (بحث دلالي محلي)
     strict_local_enabled = strict_local if 'strict_local' in locals() else True
-    results = _apply_exclude(results, none_words if 'none_words' in locals() else "")
-    results = _apply_require(results, q, exact_phrase if 'exact_phrase' in locals() else "", any_words if 'any_words' in locals() else "", enabled=strict_local_enabled)
+    results = _apply_local_filters(results, q, exact_phrase if 'exact_phrase' in locals() else "", any_words if 'any_words' in locals() else "", none_words if 'none_words' in locals() else "", enabled=strict_local_enabled)
 
 # ---------------- عرض النتائج ----------------
 def _actions_row(lang, title, pdf, source):
@@ -4,7 +4,7 @@ Search It — Pro (Journal Rankings Enrichment)
 ---------------------------------------------
 - جميع مزايا "Search It — Pro"
 - إضافة دعم اختياري لدمج **تصنيفات المجلات** عبر ملف CSV يرفعه المستخدم
-- مطابقة بالـ ISSN إن توفّر، وإلا مطابقة اسمية تقريبية باستخدام difflib (قياسي)
+- مطابقة بالـ ISSN إن توفّر، وإلا مطابقة اسمية تقريبية (نتيجة difflib نفسها عبر فهرس ثلاثيات حروف يُبنى مرة واحدة)
 - عرض حقول: Quartile / SJR / ImpactFactor / SourceURL إن توفّرت
 
 صيغة CSV المقترحة (عناوين الأعمدة المرنة التالية سيُحاول التطبيق اكتشافها تلقائيًا):
@@ -21,10 +21,11 @@ import os
 import re
 import json
 import csv
-import difflib
 import requests
 import pandas as pd
 import streamlit as st
+from local_search import apply_local_filters as _apply_local_filters
+from journal_ranking import NameIndex, parse_rank_frame
 
 # ---------------- إعدادات ----------------
 LANGS = [
@@ -181,55 +182,6 @@ def _field(obj, path, default=None):
             return default
     return cur
 
-def _reconstruct_abstract(inv_index):
-    if not inv_index or not isinstance(inv_index, dict):
-        return ""
-    pos_to_word = {}
-    max_pos = -1
-    for word, positions in inv_index.items():
-        for p in positions:
-            pos_to_word[p] = word
-            max_pos = max(max_pos, p)
-    return " ".join(pos_to_word.get(i, "") for i in range(max_pos+1)).strip() if max_pos >= 0 else ""
-
-def _tokenize(text):
-    if not text: return []
-    return [t for t in re.split(r'[\s,;:،؛]+', text.strip()) if t]
-
-def _apply_exclude(items, none_words):
-    if not none_words: 
-        return items
-    excl = [x.strip().lower() for x in re.split(r'[,\s]+', none_words) if x.strip()]
-    if not excl:
-        return items
-    filtered = []
-    for w in items:
-        title = (w.get("title") or "").lower()
-        abstract = _reconstruct_abstract(_field(w, "abstract_inverted_index") or {}).lower()
-        if any(x and ((x in title) or (x in abstract)) for x in excl):
-            continue
-        filtered.append(w)
-    return filtered
-
-def _apply_require(items, q, exact_phrase, any_words, enabled=True):
-    if not enabled:
-        return items
-    req_tokens = []
-    if q: req_tokens.extend(_tokenize(q))
-    if exact_phrase: req_tokens.append(exact_phrase.strip())
-    any_list = [w.strip() for w in any_words.split(",") if w.strip()] if any_words else []
-
-    out = []
-    for w in items:
-        text = ((w.get("title") or "") + " " +
-                _reconstruct_abstract(_field(w, "abstract_inverted_index") or ""))
-        t = text.lower()
-        ok_all = all(tok.lower() in t for tok in req_tokens) if req_tokens else True
-        ok_any = any((aw.lower() in t) for aw in any_list) if any_list else True
-        if ok_all and ok_any:
-            out.append(w)
-    return out
-
 def _build_params(q, exact_phrase, any_words, author, venue, lang_code, years, open_access_only, doc_type, sort_opt, title_only):
     params, search_terms = {}, []
     if _ok(q):             search_terms.append(q.strip())
@@ -279,47 +231,19 @@ def openalex_page(params, per_page=100, cursor="*"):
 def _norm_issn(s):
     return re.sub(r'[^0-9Xx]', '', (s or ''))
 
-def _split_multi_issn(cell):
-    if not cell: return []
-    parts = re.split(r'[,\;\|]', str(cell))
-    return [_norm_issn(p) for p in parts if _norm_issn(p)]
-
 def _lower(s): return (s or "").strip().lower()
 
 @st.cache_data(show_spinner=False)
 def parse_rank_csv(file_bytes):
-    df = pd.read_csv(io.BytesIO(file_bytes))
-    cols = {c.lower():c for c in df.columns}
-
-    # مرونة أسماء الأعمدة
-    jcol = cols.get("journal") or cols.get("title") or list(df.columns)[0]
-    icol = cols.get("issn") or cols.get("issns") or None
-    qcol = cols.get("quartile") or cols.get("q") or None
-    scol = cols.get("sjr") or None
-    icol2= cols.get("impactfactor") or cols.get("if") or cols.get("jif") or None
-    ucol = cols.get("sourceurl") or cols.get("url") or None
-
-    by_issn = {}
-    by_name = {}
-
-    for _, row in df.iterrows():
-        name = str(row.get(jcol, "")).strip()
-        entry = {
-            "Journal": name or "",
-            "Quartile": str(row.get(qcol, "") if qcol else ""),
-            "SJR": str(row.get(scol, "") if scol else ""),
-            "ImpactFactor": str(row.get(icol2, "") if icol2 else ""),
-            "SourceURL": str(row.get(ucol, "") if ucol else ""),
-        }
-        if icol:
-            issns = _split_multi_issn(row.get(icol))
-            for issn in issns:
-                by_issn[issn] = entry
-        if name:
-            by_name[_lower(name)] = entry
-    return by_issn, by_name
-
-def _match_ranking(venue_name, issn_list, by_issn, by_name):
+    # تحميل عمودي (بلا iterrows) مع مرونة أسماء الأعمدة؛ المدخل الواحد مشترك بين مفتاح ISSN ومفتاح الاسم
+    return parse_rank_frame(pd.read_csv(io.BytesIO(file_bytes)))
+
+@st.cache_resource(show_spinner=False)
+def rank_name_index(file_bytes):
+    # يُبنى مرة واحدة لكل ملف مرفوع ويبقى (مع ذاكرة المطابقات) عبر إعادة التشغيل
+    return NameIndex(parse_rank_csv(file_bytes)[1])
+
+def _match_ranking(venue_name, issn_list, by_issn, by_name, name_index=None):
     # أولوية للمطابقة عبر ISSN
     for issn in issn_list or []:
         key = _norm_issn(issn)
@@ -330,13 +254,14 @@ def _match_ranking(venue_name, issn_list, by_issn, by_name):
     name = _lower(venue_name)
     if name in by_name:
         return by_name[name]
-    # استخدم difflib للمطابقة التقريبية
-    candidates = list(by_name.keys())
-    if not candidates:
+    # مطابقة تقريبية عبر الفهرس (نفس نتيجة difflib.get_close_matches بعتبة 0.9)
+    if not by_name:
         return None
-    best = difflib.get_close_matches(name, candidates, n=1, cutoff=0.9)
+    if name_index is None:
+        name_index = NameIndex(by_name)
+    best = name_index.close_match(name)
     if best:
-        return by_name.get(best[0])
+        return by_name.get(best)
     return None
 
 # ---------------- تنفيذ البحث ----------------
@@ -348,9 +273,11 @@ if 'rank_file' in locals() and rank_file is not None:
 
 by_issn = {}
 by_name = {}
+name_index = None
 if ranking_bytes:
     try:
         by_issn, by_name = parse_rank_csv(ranking_bytes)
+        name_index = rank_name_index(ranking_bytes)
         st.success(f"تم تحميل تصنيفات المجلات: {len(by_issn)} مدخل عبر ISSN، و {len(by_name)} عبر الاسم.")
     except Exception as e:
         st.error(f"تعذّر قراءة CSV: {e}")
@@ -372,8 +299,7 @@ if do_search and q.strip():
 
     # فلترة محلية ذكية (بحث دلالي محلي)
     strict_local_enabled = strict_local if 'strict_local' in locals() else True
-    results = _apply_exclude(results, none_words if 'none_words' in locals() else "")
-    results = _apply_require(results, q, exact_phrase if 'exact_phrase' in locals() else "", any_words if 'any_words' in locals() else "", enabled=strict_local_enabled)
+    results = _apply_local_filters(results, q, exact_phrase if 'exact_phrase' in locals() else "", any_words if 'any_words' in locals() else "", none_words if 'none_words' in locals() else "", enabled=strict_local_enabled)
 
 # ---------------- عرض النتائج ----------------
 if do_search and q.strip():
@@ -403,7 +329,7 @@ if do_search and q.strip():
 
             rank_str = "—"
             if by_issn or by_name:
-                match = _match_ranking(venue, issns, by_issn, by_name)
+                match = _match_ranking(venue, issns, by_issn, by_name, name_index)
                 if match:
                     parts = []
                     if match.get("Quartile"): parts.append(f"Q: {match['Quartile']}")
@@ -1,18 +1,293 @@
 # backend_main.py
 # FastAPI microservice: /v1/search (free-then-email with mailto rotation),
-# /v1/search_bulk (up to 2000 via cursor), OA Link Resolver, Bank-only flow, Owner override (trusted device)
-import os, re, time, hmac, hashlib, base64, requests
-from typing import Optional, Dict, List
-from fastapi import FastAPI, Header, HTTPException, Request, UploadFile, File, Form, Response, Query
+# /v1/search_bulk (up to 2000 via cursor, 10,000 via parallel pages), OA Link Resolver, pooled async upstream HTTP, Bank-only flow, Owner override (trusted device)
+import os, re, sys, json, math, time, uuid, heapq, hmac, hashlib, base64, sqlite3, tempfile, threading, asyncio, httpx
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, List, Iterator, AsyncIterator
+from fastapi import FastAPI, Header, HTTPException, Request, UploadFile, File, Form, Response, Query, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, FileResponse
+from starlette.background import BackgroundTask
+try: import fcntl
+except ImportError: fcntl = None
+from export_helpers import work_row, csv_chunk, ris_chunk, bibtex_chunk, XlsxSink, ParquetSink
 
-APP = FastAPI(title="SearchItPro Backend")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = asyncio.create_task(sweep_state())
+    resume_jobs()
+    yield
+    sweeper.cancel()
+    for task in list(_JOB_TASKS.values()): task.cancel()  # checkpoints stay "running" and resume on next start
+    for cache in (SEARCH_CACHE, RESOLVE_CACHE): await asyncio.to_thread(cache.flush)
+    await close_http()
+
+APP = FastAPI(title="SearchItPro Backend", lifespan=lifespan)
 APP.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
 UA = "SearchItPro/1.0"
 OPENALEX_BASE = "https://api.openalex.org/works"
 TIMEOUT = 30
 
+# --------- Outbound HTTP (one pooled keep-alive async client for every upstream call) ----------
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))          # number of upstream hosts kept warm
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "20"))  # max concurrent connections per host
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))           # 0.5s, 1s, 2s ... between retries
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRY_AFTER = 60.0
+
+_AHTTP: Optional[httpx.AsyncClient] = None
+_HOST_LIMITS: Dict[str, "AIMDLimiter"] = {}
+HTTP_CALLS = {"requests": 0, "retries": 0}
+HTTP_HOSTS: Dict[str, Dict[str, int]] = {}  # host -> connections_opened / tls_handshakes / requests_sent
+
+def _client() -> httpx.AsyncClient:
+    global _AHTTP
+    if _AHTTP is None:
+        n = HTTP_POOL_SIZE * HTTP_POOL_PER_HOST
+        _AHTTP = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=n, max_keepalive_connections=n, keepalive_expiry=60),
+            headers={"User-Agent": UA}, timeout=TIMEOUT, follow_redirects=True)
+    return _AHTTP
+
+async def close_http():
+    global _AHTTP
+    if _AHTTP is not None:
+        await _AHTTP.aclose()
+        _AHTTP = None
+
+def _host_counters(host: str) -> Dict[str, int]:
+    return HTTP_HOSTS.setdefault(host, {"connections_opened": 0, "tls_handshakes": 0, "requests_sent": 0})
+
+def _tracer(counters: Dict[str, int]):
+    # httpcore reports connection set-up through the "trace" extension; reused connections skip these events
+    async def trace(event: str, info: Dict):
+        if event == "connection.connect_tcp.complete": counters["connections_opened"] += 1
+        elif event == "connection.start_tls.complete": counters["tls_handshakes"] += 1
+    return trace
+
+def _retry_after(r: Optional[httpx.Response]) -> Optional[float]:
+    ra = r.headers.get("retry-after") if r is not None else None
+    if not ra: return None
+    try: return min(MAX_RETRY_AFTER, max(0.0, float(ra)))
+    except ValueError:
+        try: return min(MAX_RETRY_AFTER, max(0.0, parsedate_to_datetime(ra).timestamp() - time.time()))
+        except (TypeError, ValueError): return None
+
+def _retry_delay(r: Optional[httpx.Response], attempt: int) -> float:
+    ra = _retry_after(r)
+    return ra if ra is not None else HTTP_BACKOFF * (2 ** attempt)
+
+class AIMDLimiter:
+    # per-host concurrency window: +1 slot per window of successes, halved on 429/503 at most once per
+    # congestion event (overloads from requests sent before the last decrease are the same burst);
+    # a Retry-After pauses every caller of that host, not only the one that got it
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.max_limit, self.min_limit = max_limit, min_limit
+        self.limit = float(max_limit)
+        self.inflight = 0
+        self.paused_until = 0.0
+        self.last_decrease = float("-inf")
+        self._cond = asyncio.Condition()
+        self.counters = {"overloads": 0, "decreases": 0, "paused_s": 0.0}
+
+    async def wait_pause(self):
+        pause = self.paused_until - time.monotonic()
+        if pause > 0: await asyncio.sleep(pause)
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.inflight < int(self.limit))
+            self.inflight += 1
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.inflight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def on_overload(self, retry_after: Optional[float], sent_at: float):
+        self.counters["overloads"] += 1
+        if sent_at >= self.last_decrease:
+            self.limit = max(self.min_limit, self.limit / 2)
+            self.last_decrease = time.monotonic()
+            self.counters["decreases"] += 1
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            self.counters["paused_s"] += retry_after
+
+    def stats(self) -> Dict:
+        return dict(self.counters, paused_s=round(self.counters["paused_s"], 2), limit=round(self.limit, 2), inflight=self.inflight,
+                    paused_for=round(max(0.0, self.paused_until - time.monotonic()), 2))
+
+async def http_get(url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+                   timeout: float = TIMEOUT) -> httpx.Response:
+    host = httpx.URL(url).host
+    limiter = _HOST_LIMITS.get(host)
+    if limiter is None: limiter = _HOST_LIMITS[host] = AIMDLimiter(HTTP_POOL_PER_HOST)
+    counters = _host_counters(host)
+    ext = {"trace": _tracer(counters)}
+    HTTP_CALLS["requests"] += 1
+    for attempt in range(HTTP_RETRIES + 1):
+        r = None
+        try:
+            await limiter.wait_pause()
+            async with limiter:
+                counters["requests_sent"] += 1
+                sent_at = time.monotonic()
+                r = await _client().get(url, params=params, headers=headers, timeout=timeout, extensions=ext)
+            if r.status_code in (429, 503): limiter.on_overload(_retry_after(r), sent_at)
+            elif r.status_code < 500: limiter.on_success()
+            if r.status_code not in RETRY_STATUSES or attempt == HTTP_RETRIES: return r
+        except httpx.TransportError:
+            if attempt == HTTP_RETRIES: raise
+        HTTP_CALLS["retries"] += 1
+        await asyncio.sleep(_retry_delay(r, attempt))
+
+def http_stats() -> Dict:
+    hosts = {h: dict(c, reused=max(0, c["requests_sent"] - c["connections_opened"]),
+                     **({"aimd": _HOST_LIMITS[h].stats()} if h in _HOST_LIMITS else {})) for h, c in HTTP_HOSTS.items()}
+    opened = sum(h["connections_opened"] for h in hosts.values())
+    sent = sum(h["requests_sent"] for h in hosts.values())
+    return {
+        "calls": HTTP_CALLS["requests"], "retries": HTTP_CALLS["retries"], "requests_sent": sent,
+        "handshakes": opened, "tls_handshakes": sum(h["tls_handshakes"] for h in hosts.values()),
+        "reused": max(0, sent - opened), "pool_size": HTTP_POOL_SIZE, "per_host": HTTP_POOL_PER_HOST,
+        "hosts": hosts,
+    }
+
+# --------- Caches (in-process LRU + TTL, optional SQLite tier that survives restarts) ----------
+SQLITE_BUSY_SEC = float(os.getenv("SQLITE_BUSY_SEC", "2"))
+
+class TTLCache:
+    # the SQLite file is opened on first use, in WAL mode so workers sharing it read while one writes;
+    # writes are queued and committed in batches off the event loop, and any disk error is a cache miss
+    def __init__(self, name: str, max_entries: int, ttl: float, db_path: str = ""):
+        self.name, self.max_entries, self.ttl, self.db_path = name, max_entries, ttl, db_path
+        self._mem: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value), oldest first
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0, "disk_errors": 0}
+        self._db = None                  # reader, event-loop thread
+        self._wdb = None                 # writer, only used under _wlock
+        self._wlock = threading.Lock()
+        self._pending: List[tuple] = []  # rows waiting for the next batched commit
+        self._flush_task: Optional[asyncio.Task] = None
+        self._writes = 0
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=SQLITE_BUSY_SEC)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_SEC * 1000)}")
+        db.execute("CREATE TABLE IF NOT EXISTS cache (name TEXT, key TEXT, exp REAL, value TEXT, PRIMARY KEY (name, key))")
+        db.commit()
+        return db
+
+    def _disk_get(self, key: str, now: float):
+        try:
+            if self._db is None: self._db = self._connect()
+            return self._db.execute("SELECT exp, value FROM cache WHERE name=? AND key=? AND exp>?", (self.name, key, now)).fetchone()
+        except sqlite3.Error:
+            self.counters["disk_errors"] += 1
+            return None
+
+    def _write(self, rows: List[tuple]):
+        with self._wlock:
+            try:
+                if self._wdb is None: self._wdb = self._connect()
+                self._wdb.executemany("INSERT OR REPLACE INTO cache VALUES (?,?,?,?)", rows)
+                if (self._writes + len(rows)) // 500 > self._writes // 500:
+                    self._wdb.execute("DELETE FROM cache WHERE name=? AND exp<=?", (self.name, time.time()))
+                self._wdb.commit()
+                self._writes += len(rows)
+            except sqlite3.Error:
+                self.counters["disk_errors"] += 1  # the entries stay in memory; only the restart copy is lost
+
+    def flush(self):
+        rows, self._pending = self._pending, []
+        if rows: self._write(rows)
+
+    async def _flush_soon(self):
+        try:
+            while self._pending:
+                rows, self._pending = self._pending, []
+                await asyncio.to_thread(self._write, rows)
+        finally:
+            self._flush_task = None
+
+    def _remember(self, key: str, exp: float, value):
+        self._mem[key] = (exp, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def get(self, key: str, count: bool = True):
+        # count=False peeks without touching hit/miss counters (warmup checks)
+        now = time.time()
+        hit = self._mem.get(key)
+        if hit is not None:
+            if hit[0] > now:
+                self._mem.move_to_end(key)
+                if count: self.counters["hits"] += 1
+                return hit[1]
+            del self._mem[key]
+            self.counters["expired"] += 1
+        if self.db_path:
+            row = self._disk_get(key, now)
+            if row:
+                value = json.loads(row[1])
+                self._remember(key, row[0], value)
+                if count: self.counters["hits"] += 1; self.counters["disk_hits"] += 1
+                return value
+        if count: self.counters["misses"] += 1
+        return None
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        exp = time.time() + (self.ttl if ttl is None else ttl)
+        self._remember(key, exp, value)
+        if self.db_path:
+            self._pending.append((self.name, key, exp, json.dumps(value)))
+            if self._flush_task is None:
+                try: self._flush_task = asyncio.get_running_loop().create_task(self._flush_soon())
+                except RuntimeError: self.flush()  # no event loop (scripts, tests): write through
+
+    def stats(self) -> Dict:
+        looked = self.counters["hits"] + self.counters["misses"]
+        return dict(self.counters, entries=len(self._mem), max_entries=self.max_entries, ttl=self.ttl,
+                    hit_rate=round(self.counters["hits"] / looked, 4) if looked else 0.0, disk=bool(self.db_path),
+                    pending_writes=len(self._pending))
+
+# --------- Single-flight: identical in-flight upstream calls share one request ----------
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.counters = {"calls": 0, "upstream": 0, "coalesced": 0}
+
+    async def do(self, key: str, factory):
+        # the shared call runs as its own task, so a caller that disconnects does not cancel it for the others
+        self.counters["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.counters["upstream"] += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        else:
+            self.counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict:
+        return dict(self.counters, inflight=len(self._inflight))
+
+SEARCH_FLIGHT = SingleFlight("search")
+RESOLVE_FLIGHT = SingleFlight("resolve")
+
 # --------- OWNER MAILTOS (rotation for first-free only) ----------
 OWNER_MAILTOS = [e.strip() for e in os.getenv(
     "OWNER_MAILTOS",
@@ -56,17 +331,129 @@ def valid_iban_eg(iban: str) -> bool:
         r = (r*10 + int(c)) % 97
     return r == 1
 
+# --------- Shared state store (FREE_USED / OTP_STORE): in-process by default, Redis for multi-worker ----------
+STATE_REDIS_URL = os.getenv("STATE_REDIS_URL", "")
+STATE_PREFIX = os.getenv("STATE_PREFIX", "searchitpro")
+STATE_SWEEP_SEC = float(os.getenv("STATE_SWEEP_SEC", "60"))
+
+class MemoryStore:
+    # one process only; a min-heap of expiry times lets the sweeper drop stale entries without scanning,
+    # and max_entries caps memory by evicting the entries closest to expiry first
+    def __init__(self, namespace: str, max_entries: int = 100000):
+        self.namespace, self.max_entries = namespace, max_entries
+        self._data: Dict[str, tuple] = {}   # key -> (expires_at, value)
+        self._heap: List[tuple] = []        # (expires_at, key); stale pairs are skipped lazily
+        self._bytes = 0
+        self._lock = threading.Lock()       # sync endpoints run in the thread pool
+        self.counters = {"expired": 0, "evicted": 0}
+
+    @staticmethod
+    def _size(key: str, rec: tuple) -> int:
+        value = rec[1]
+        inner = sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items()) if isinstance(value, dict) else 0
+        return sys.getsizeof(key) + sys.getsizeof(rec) + sys.getsizeof(rec[0]) + sys.getsizeof(value) + inner
+
+    def _drop(self, key: str):
+        rec = self._data.pop(key, None)
+        if rec is not None: self._bytes -= self._size(key, rec)
+
+    def get(self, key: str):
+        with self._lock:
+            rec = self._data.get(key)
+            if rec is None: return None
+            if rec[0] <= time.time():
+                self._drop(key)
+                self.counters["expired"] += 1
+                return None
+            return rec[1]
+
+    def set(self, key: str, value, ttl: float):
+        rec = (time.time() + ttl, value)
+        with self._lock:
+            self._drop(key)
+            self._data[key] = rec
+            self._bytes += self._size(key, rec)
+            while len(self._data) > self.max_entries and self._heap:
+                exp, k = heapq.heappop(self._heap)
+                if k in self._data and self._data[k][0] == exp:
+                    self._drop(k)
+                    self.counters["evicted"] += 1
+            heapq.heappush(self._heap, (rec[0], key))
+            if len(self._heap) > 2 * len(self._data) + 64:  # re-set keys leave stale heap pairs behind
+                self._heap = [(r[0], k) for k, r in self._data.items()]
+                heapq.heapify(self._heap)
+
+    def delete(self, key: str):
+        with self._lock: self._drop(key)
+
+    def sweep(self) -> int:
+        now, n = time.time(), 0
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                exp, k = heapq.heappop(self._heap)
+                rec = self._data.get(k)
+                if rec is not None and rec[0] == exp:
+                    self._drop(k)
+                    n += 1
+            self.counters["expired"] += n
+        return n
+
+    # async handlers call these; an in-process dict never blocks, so no thread hop
+    async def aget(self, key: str): return self.get(key)
+
+    async def aset(self, key: str, value, ttl: float): self.set(key, value, ttl)
+
+    def stats(self) -> Dict:
+        return dict(self.counters, backend="memory", entries=len(self._data), bytes=self._bytes + sys.getsizeof(self._data),
+                    heap=len(self._heap), max_entries=self.max_entries)
+
+class RedisStore:
+    # shared by every worker/node; Redis expires keys itself (PX), values are JSON
+    def __init__(self, namespace: str, client):
+        self.namespace, self._r = namespace, client
+
+    def _k(self, key: str) -> str: return f"{STATE_PREFIX}:{self.namespace}:{key}"
+
+    def get(self, key: str):
+        raw = self._r.get(self._k(key))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value, ttl: float):
+        self._r.set(self._k(key), json.dumps(value), px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str): self._r.delete(self._k(key))
+
+    # redis-py blocks for a network round trip: async handlers go through a worker thread
+    async def aget(self, key: str): return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value, ttl: float): await asyncio.to_thread(self.set, key, value, ttl)
+
+    def sweep(self) -> int: return 0  # Redis expires keys on its own
+
+    def stats(self) -> Dict: return {"backend": "redis"}
+
+_REDIS = None
+
+def make_store(namespace: str, max_entries: int = 100000):
+    global _REDIS
+    if not STATE_REDIS_URL: return MemoryStore(namespace, max_entries)
+    if _REDIS is None:
+        import redis  # optional: only needed when STATE_REDIS_URL is set
+        _REDIS = redis.Redis.from_url(STATE_REDIS_URL, decode_responses=True)
+    return RedisStore(namespace, _REDIS)
+
 # --------- OTP + Signed cookies (light) ----------
 SECRET = os.getenv("BACKEND_SECRET","change-me")
 def sign_token(payload: str) -> str:
     sig = hmac.new(SECRET.encode(), payload.encode(), hashlib.sha256).digest()
     return base64.urlsafe_b64encode(sig).decode().rstrip("=")
 
-OTP_STORE: Dict[str, Dict] = {}  # email -> {"code":..., "exp":...}
+OTP_TTL_SEC = 600
+OTP_STORE = make_store("otp", int(os.getenv("OTP_MAX_ENTRIES", "10000")))  # email -> {"code":..., "exp":...}
 
 # --------- First-free tracking ----------
 FREE_TTL_SEC = 24*3600
-FREE_USED: Dict[str, float] = {}  # ip -> last ts
+FREE_USED = make_store("free", int(os.getenv("FREE_MAX_ENTRIES", "200000")))  # ip -> last ts, expires after FREE_TTL_SEC
 
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 def looks_like_email(x: str) -> bool: return bool(x and EMAIL_RE.match(x))
@@ -76,27 +463,105 @@ def ip_from_request(req: Request) -> str:
     if fwd: return fwd.split(",")[0].strip()
     return req.client.host if req.client else "0.0.0.0"
 
-def free_allowed(ip: str) -> bool:
-    t = FREE_USED.get(ip)
-    now = time.time()
-    return (not t) or ((now - t) > FREE_TTL_SEC)
+async def sweep_state():
+    while True:
+        await asyncio.sleep(STATE_SWEEP_SEC)
+        for store in (FREE_USED, OTP_STORE): store.sweep()
+        await asyncio.to_thread(sweep_jobs)
+
+async def free_allowed(ip: str) -> bool: return await FREE_USED.aget(ip) is None
 
-def mark_free_used(ip: str): FREE_USED[ip] = time.time()
+async def mark_free_used(ip: str): await FREE_USED.aset(ip, time.time(), FREE_TTL_SEC)
 
 def pick_owner_mailto(ip: str) -> str:
+    # least-loaded owner mailto; the IP hash only breaks ties so idle periods still spread users out
     if not OWNER_MAILTOS: return ""
-    h = int(hashlib.sha256(ip.encode()).hexdigest(), 16)
-    return OWNER_MAILTOS[h % len(OWNER_MAILTOS)]
+    h = int(hashlib.sha256(ip.encode()).hexdigest(), 16) % len(OWNER_MAILTOS)
+    return QUOTA.least_loaded(OWNER_MAILTOS[h:] + OWNER_MAILTOS[:h])
+
+# --------- Upstream quota: token buckets per mailto (OpenAlex polite pool) and per client IP ----------
+MAILTO_RPS = float(os.getenv("MAILTO_RPS", "8"))          # OpenAlex polite pool allows ~10 req/s per mailto
+MAILTO_BURST = float(os.getenv("MAILTO_BURST", "10"))
+CLIENT_RPS = float(os.getenv("CLIENT_RPS", "2"))
+CLIENT_BURST = float(os.getenv("CLIENT_BURST", "30"))
+QUOTA_MAX_WAIT = float(os.getenv("QUOTA_MAX_WAIT", "5"))  # queue up to this long, then shed with 429
+QUOTA_MAX_KEYS = 50000
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "stamp")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate, self.capacity, self.tokens, self.stamp = rate, capacity, capacity, time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def remaining(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def reserve(self, n: float = 1.0) -> float:
+        # take n tokens now (the balance may go negative) and return the wait until they are really available
+        self._refill()
+        self.tokens -= n
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, n: float = 1.0): self.tokens += n
+
+class QuotaManager:
+    def __init__(self):
+        self.mailtos: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.clients: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.counters = {"admitted": 0, "queued": 0, "shed": 0}
+
+    @staticmethod
+    def _bucket(table: OrderedDict, key: str, rate: float, burst: float) -> TokenBucket:
+        b = table.get(key)
+        if b is None:
+            b = table[key] = TokenBucket(rate, burst)
+            while len(table) > QUOTA_MAX_KEYS: table.popitem(last=False)  # least recently used, usually refilled
+        table.move_to_end(key)
+        return b
+
+    def least_loaded(self, mailtos: List[str]) -> str:
+        return max(mailtos, key=lambda m: self._bucket(self.mailtos, m, MAILTO_RPS, MAILTO_BURST).remaining())
+
+    async def acquire(self, mailto: str, ip: str, max_wait: Optional[float] = QUOTA_MAX_WAIT):
+        # max_wait=None queues without shedding (multi-page pulls already admitted)
+        buckets = [self._bucket(self.mailtos, mailto or "-", MAILTO_RPS, MAILTO_BURST)]
+        if ip: buckets.append(self._bucket(self.clients, ip, CLIENT_RPS, CLIENT_BURST))
+        wait = max(b.reserve() for b in buckets)
+        if max_wait is not None and wait > max_wait:
+            for b in buckets: b.refund()
+            self.counters["shed"] += 1
+            raise HTTPException(429, "Upstream quota exhausted, retry shortly.", headers={"Retry-After": str(math.ceil(wait))})
+        self.counters["admitted"] += 1
+        if wait > 0:
+            self.counters["queued"] += 1
+            await asyncio.sleep(wait)
+
+    def budget(self, key: str, table: OrderedDict) -> float:
+        b = table.get(key)
+        return round(b.remaining(), 2) if b else (MAILTO_BURST if table is self.mailtos else CLIENT_BURST)
+
+    def stats(self) -> Dict:
+        return dict(self.counters, mailto_rps=MAILTO_RPS, client_rps=CLIENT_RPS, clients_tracked=len(self.clients),
+                    mailtos={mask(m): round(b.remaining(), 2) for m, b in self.mailtos.items()})
+
+QUOTA = QuotaManager()
 
 # --------- OA Link Resolver (Unpaywall + Semantic Scholar) ----------
 UNPAYWALL_MAILTO = os.getenv("UNPAYWALL_MAILTO","")
 
-def try_unpaywall(doi: str) -> Dict:
+async def try_unpaywall(doi: str) -> Dict:
     if not doi: return {}
     url = f"https://api.unpaywall.org/v2/{doi}"
     params = {"email": UNPAYWALL_MAILTO} if UNPAYWALL_MAILTO else {}
-    r = requests.get(url, params=params, timeout=TIMEOUT, headers={"User-Agent": UA})
-    if r.ok:
+    r = await http_get(url, params=params)
+    if r.status_code in RETRY_STATUSES: r.raise_for_status()  # transient: let the caller skip caching
+    if r.is_success:
         j = r.json()
         best = j.get("best_oa_location") or {}
         return {
@@ -106,11 +571,12 @@ def try_unpaywall(doi: str) -> Dict:
         }
     return {}
 
-def try_semanticscholar(doi: str) -> Dict:
+async def try_semanticscholar(doi: str) -> Dict:
     if not doi: return {}
     url = f"https://api.semanticscholar.org/graph/v1/paper/DOI:{doi}"
-    r = requests.get(url, params={"fields":"title,openAccessPdf,url"}, timeout=TIMEOUT, headers={"User-Agent": UA})
-    if r.ok:
+    r = await http_get(url, params={"fields":"title,openAccessPdf,url"})
+    if r.status_code in RETRY_STATUSES: r.raise_for_status()
+    if r.is_success:
         j = r.json()
         pdf = (j.get("openAccessPdf") or {}).get("url") or ""
         if pdf: return {"oa_pdf_url": pdf, "provenance":"SemanticScholar"}
@@ -119,37 +585,217 @@ def try_semanticscholar(doi: str) -> Dict:
 @APP.get("/health")
 def health(): return {"ok": True}
 
-@APP.get("/resolve")
-def resolve_oa(doi: Optional[str] = None, title: Optional[str] = None):
-    out = {"oa_pdf_url":"", "oa_html_url":"", "publisher_landing_url":"", "provenance":""}
-    if doi:
-        u = try_unpaywall(doi)
-        if u.get("oa_pdf_url") or u.get("oa_html_url"): out.update(u)
-        if not out["oa_pdf_url"]:
-            s = try_semanticscholar(doi)
-            if s.get("oa_pdf_url"): out.update(s)
-        out["publisher_landing_url"] = f"https://doi.org/{doi}"
+@APP.get("/stats")
+async def stats():  # on the loop that owns QUOTA's buckets and LRU dicts; a threadpool read races their updates
+    return {
+        "http": http_stats(),
+        "search_cache": SEARCH_CACHE.stats(),
+        "resolve_cache": RESOLVE_CACHE.stats(),
+        "resolve_providers": provider_stats(),
+        "singleflight": {"search": SEARCH_FLIGHT.stats(), "resolve": RESOLVE_FLIGHT.stats()},
+        "state": {"free_used": FREE_USED.stats(), "otp": OTP_STORE.stats()},
+        "quota": QUOTA.stats(),
+    }
+
+@APP.get("/v1/quota")
+async def quota(request: Request, user_mailto: str | None = None):
+    ip = ip_from_request(request)
+    out = {"client_remaining": QUOTA.budget(ip, QUOTA.clients), "client_rps": CLIENT_RPS,
+           "owner_mailtos_remaining": {mask(m): QUOTA.budget(m, QUOTA.mailtos) for m in OWNER_MAILTOS}}
+    if user_mailto and looks_like_email(user_mailto):
+        out["mailto_remaining"] = QUOTA.budget(user_mailto.strip(), QUOTA.mailtos)
+    return out
+
+RESOLVE_FANOUT = int(os.getenv("RESOLVE_FANOUT", "8"))
+RESOLVE_BATCH_MAX = 200
+RESOLVE_BATCH_BUDGET = float(os.getenv("RESOLVE_BATCH_BUDGET", "12"))  # seconds; below the UI's 20s client timeout
+
+def clean_doi(doi: str) -> str:
+    d = (doi or "").strip()
+    for prefix in ("https://doi.org/", "http://doi.org/", "doi:"):
+        if d.lower().startswith(prefix): d = d[len(prefix):]
+    return d
+
+def empty_links(doi: str = "") -> Dict:
+    return {"oa_pdf_url":"", "oa_html_url":"", "publisher_landing_url": f"https://doi.org/{doi}" if doi else "", "provenance":""}
+
+# --------- Resolver strategy: sequential (preference order), race (first PDF wins) or merge (wait for all) ----------
+PROVIDERS = {"Unpaywall": try_unpaywall, "SemanticScholar": try_semanticscholar}
+RESOLVE_STRATEGY = os.getenv("RESOLVE_STRATEGY", "sequential")
+RESOLVE_PREFERENCE = [p for p in (x.strip() for x in os.getenv("RESOLVE_PREFERENCE", "Unpaywall,SemanticScholar").split(","))
+                      if p in PROVIDERS] or list(PROVIDERS)
+PROVIDER_STATS = {n: {"calls": 0, "pdf_found": 0, "errors": 0, "cancelled": 0, "total_ms": 0.0} for n in PROVIDERS}
+
+async def call_provider(name: str, doi: str) -> Dict:
+    st = PROVIDER_STATS[name]
+    st["calls"] += 1
+    t0 = time.perf_counter()
+    try:
+        res = await PROVIDERS[name](doi)
+    except httpx.HTTPError:
+        st["errors"] += 1
+        st["total_ms"] += (time.perf_counter() - t0) * 1000
+        raise
+    except asyncio.CancelledError:
+        st["cancelled"] += 1
+        raise
+    st["total_ms"] += (time.perf_counter() - t0) * 1000
+    if res.get("oa_pdf_url"): st["pdf_found"] += 1
+    return res
+
+def merge_answers(answers: Dict[str, Dict]) -> Dict:
+    # PDF and HTML links each come from the most preferred provider that has one
+    ranked = [answers[n] for n in RESOLVE_PREFERENCE if answers.get(n)]
+    pdf = next((a for a in ranked if a.get("oa_pdf_url")), {})
+    html = next((a for a in ranked if a.get("oa_html_url")), {})
+    return {"oa_pdf_url": pdf.get("oa_pdf_url", ""), "oa_html_url": html.get("oa_html_url", ""),
+            "provenance": pdf.get("provenance") or html.get("provenance") or ""}
+
+def provider_stats() -> Dict:
+    out = {"strategy": RESOLVE_STRATEGY, "preference": RESOLVE_PREFERENCE}
+    for n, st in PROVIDER_STATS.items():
+        done = st["calls"] - st["cancelled"]
+        out[n] = dict(st, total_ms=round(st["total_ms"], 1), avg_ms=round(st["total_ms"] / done, 1) if done else 0.0,
+                      success_rate=round(st["pdf_found"] / done, 4) if done else 0.0)
     return out
 
+async def lookup_links(doi: str, strategy: Optional[str] = None) -> tuple:
+    # -> (links, complete); complete is False when a provider failed transiently, so the answer is not cached
+    out, complete = empty_links(), True
+    if not doi: return out, complete
+    strategy = strategy or RESOLVE_STRATEGY
+    answers: Dict[str, Dict] = {}
+    if strategy == "sequential":
+        for name in RESOLVE_PREFERENCE:
+            try: answers[name] = await call_provider(name, doi)
+            except httpx.HTTPError: complete = False
+            if answers.get(name, {}).get("oa_pdf_url"): break
+    else:
+        tasks = {asyncio.create_task(call_provider(n, doi)): n for n in RESOLVE_PREFERENCE}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    try: answers[tasks[t]] = t.result()
+                    except httpx.HTTPError: complete = False
+                if strategy == "race" and any(a.get("oa_pdf_url") for a in answers.values()): break
+        finally:
+            for t in pending: t.cancel()
+    out.update(merge_answers(answers))
+    out["publisher_landing_url"] = f"https://doi.org/{doi}"
+    return out, complete
+
+# --------- Persistent DOI -> OA link cache (OA status rarely changes; misses expire sooner) ----------
+RESOLVE_TTL_POSITIVE = float(os.getenv("RESOLVE_TTL_POSITIVE", str(7*24*3600)))
+RESOLVE_TTL_NEGATIVE = float(os.getenv("RESOLVE_TTL_NEGATIVE", str(24*3600)))
+RESOLVE_CACHE = TTLCache("resolve", max_entries=int(os.getenv("RESOLVE_CACHE_MAX", "50000")),
+                         ttl=RESOLVE_TTL_POSITIVE, db_path=os.getenv("RESOLVE_CACHE_DB", "resolve_cache.db"))
+WARMUP_MAX = 5000
+_WARMUPS: set = set()  # keeps background warmup tasks referenced until they finish
+
+async def resolve_doi(doi: str, strategy: Optional[str] = None) -> Dict:
+    if not doi: return empty_links()
+    key = doi.lower()
+    hit = RESOLVE_CACHE.get(key)
+    if hit is not None: return hit
+    async def fetch() -> Dict:
+        out, complete = await lookup_links(doi, strategy)
+        if complete:
+            found = out["oa_pdf_url"] or out["oa_html_url"]
+            RESOLVE_CACHE.set(key, out, ttl=RESOLVE_TTL_POSITIVE if found else RESOLVE_TTL_NEGATIVE)
+        return out
+    return await RESOLVE_FLIGHT.do(key, fetch)
+
+@APP.get("/resolve")
+async def resolve_oa(doi: Optional[str] = None, title: Optional[str] = None,
+                     strategy: Optional[str] = Query(None, pattern="^(sequential|race|merge)$")):
+    return await resolve_doi(doi or "", strategy)
+
+def _keep_running(task: asyncio.Task):
+    # a lookup that missed its deadline still finishes in the background and fills RESOLVE_CACHE
+    _WARMUPS.add(task)
+    task.add_done_callback(lambda t: (_WARMUPS.discard(t), t.cancelled() or t.exception()))
+
+@APP.post("/resolve_batch")
+async def resolve_batch(dois: List[str] = Body(..., embed=True, max_length=RESOLVE_BATCH_MAX)):
+    # one call per result page: resolve every DOI concurrently (bounded) and answer with {input_doi: links};
+    # DOIs still resolving after RESOLVE_BATCH_BUDGET come back as bare links instead of failing the whole page
+    gate = asyncio.Semaphore(RESOLVE_FANOUT)
+    wanted = {d: clean_doi(d) for d in dois if clean_doi(d)}
+    async def one(doi: str) -> Dict:
+        async with gate: return await resolve_doi(doi)
+    tasks = {d: asyncio.create_task(one(d)) for d in dict.fromkeys(wanted.values())}
+    pending = set()
+    if tasks: _, pending = await asyncio.wait(tasks.values(), timeout=RESOLVE_BATCH_BUDGET)
+    for t in pending: _keep_running(t)
+    found = {d: empty_links(d) if t in pending else t.result() for d, t in tasks.items()}
+    return {"results": {raw: found[d] for raw, d in wanted.items()}}
+
+@APP.post("/resolve/warmup")
+async def resolve_warmup(dois: List[str] = Body(..., embed=True, max_length=WARMUP_MAX)):
+    unique = [d for d in dict.fromkeys(clean_doi(x) for x in dois) if d]
+    todo = [d for d in unique if RESOLVE_CACHE.get(d.lower(), count=False) is None]
+    async def run():
+        gate = asyncio.Semaphore(RESOLVE_FANOUT)
+        async def one(doi: str):
+            async with gate: await resolve_doi(doi)
+        await asyncio.gather(*(one(d) for d in todo), return_exceptions=True)
+    if todo:
+        task = asyncio.create_task(run())
+        _WARMUPS.add(task)
+        task.add_done_callback(_WARMUPS.discard)
+    return {"status": "WARMING" if todo else "WARM", "queued": len(todo), "cached": len(unique) - len(todo)}
+
+# --------- Field projection (OpenAlex select=) ----------
+# Named views match what each screen actually reads; abstracts, references and concepts dominate full payloads.
+FIELD_VIEWS = {
+    "list": "id,doi,title,display_name,publication_year,primary_location,authorships,open_access",
+    "export": "id,doi,title,display_name,publication_year,primary_location",
+    "full": "",
+}
+FIELD_RE = re.compile(r"^[a-z_]+$")
+
+def select_param(fields: Optional[str]) -> str:
+    if not fields: return ""
+    if fields in FIELD_VIEWS: return FIELD_VIEWS[fields]
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    bad = [f for f in names if not FIELD_RE.match(f)]
+    if bad: raise HTTPException(400, f"Invalid field name(s): {', '.join(bad)}")
+    return ",".join(dict.fromkeys(["id", *names]))  # id is always kept for de-duplication
+
+# --------- Search response cache ----------
+def cache_key(params: Dict) -> str:
+    # mailto only picks the OpenAlex quota bucket, so it never splits the cache
+    norm = {k: v for k, v in params.items() if k != "mailto" and v not in (None, "")}
+    if "search" in norm: norm["search"] = " ".join(str(norm["search"]).lower().split())
+    return json.dumps(norm, sort_keys=True, ensure_ascii=False)
+
+SEARCH_CACHE = TTLCache("search", max_entries=int(os.getenv("SEARCH_CACHE_MAX", "1000")),
+                        ttl=float(os.getenv("SEARCH_CACHE_TTL", "900")), db_path=os.getenv("SEARCH_CACHE_DB", ""))
+
 # --------- Search: first-free, then require email (mailto) ----------
 @APP.get("/v1/search")
-def search(
+async def search(
     q: str = Query(..., min_length=1),
     per_page: int = Query(25, ge=1, le=200),
+    fields: str | None = None,
     user_mailto: str | None = None,
     request: Request = None,
     x_api_key: str = Header(None),
 ):
     ip = ip_from_request(request)
     params = {"search": q, "per_page": per_page}
+    select = select_param(fields)
+    if select: params["select"] = select
     selected_mailto = ""
 
     if user_mailto and looks_like_email(user_mailto):
         selected_mailto = user_mailto.strip()
     else:
-        if free_allowed(ip):
+        if await free_allowed(ip):
             selected_mailto = pick_owner_mailto(ip)
-            mark_free_used(ip)
+            await mark_free_used(ip)
         else:
             raise HTTPException(
                 status_code=428,
@@ -161,48 +807,523 @@ def search(
                 }
             )
 
-    if selected_mailto: params["mailto"] = selected_mailto
-    headers = {"User-Agent": f"{UA} ({'mailto:'+selected_mailto if selected_mailto else 'no-mailto'})"}
-    r = requests.get(OPENALEX_BASE, params=params, headers=headers, timeout=TIMEOUT)
+    key = cache_key(params)
+    page = SEARCH_CACHE.get(key)
+    if page is None:
+        if selected_mailto: params["mailto"] = selected_mailto
+        headers = {"User-Agent": f"{UA} ({'mailto:'+selected_mailto if selected_mailto else 'no-mailto'})"}
+        async def fetch() -> Dict:
+            data = await openalex_page(params, headers, ip)
+            page = {"count": data.get("meta", {}).get("count", 0), "results": data.get("results", [])}
+            SEARCH_CACHE.set(key, page)
+            return page
+        page = await SEARCH_FLIGHT.do(key, fetch)
+    return {"mailto_used": selected_mailto, "count": page["count"], "results": page["results"]}
+
+# --------- Bulk search up to 2000 (cursor pagination) or 10,000 (parallel page prefetch) ----------
+BULK_PER_PAGE = 200        # OpenAlex per_page ceiling
+BULK_CURSOR_MAX = 2000
+PAGE_MODE_MAX = 10000      # OpenAlex serves page= pagination only for the first 10,000 results
+BULK_FANOUT = int(os.getenv("BULK_FANOUT", "4"))
+
+async def bulk_mailto(ip: str, user_mailto: Optional[str]) -> str:
+    if user_mailto and looks_like_email(user_mailto): return user_mailto.strip()
+    if await free_allowed(ip):
+        await mark_free_used(ip)
+        return pick_owner_mailto(ip)
+    raise HTTPException(428, "Email required after first success.")
+
+def mailto_headers(mailto: str) -> Dict:
+    return {"User-Agent": f"{UA} ({'mailto:'+mailto if mailto else 'no-mailto'})"}
+
+async def openalex_page(params: Dict, headers: Dict, ip: str = "", max_wait: Optional[float] = QUOTA_MAX_WAIT) -> Dict:
+    await QUOTA.acquire(params.get("mailto", ""), ip, max_wait)
+    r = await http_get(OPENALEX_BASE, params=params, headers=headers)
     r.raise_for_status()
-    data = r.json()
-    return {"mailto_used": selected_mailto, "count": data.get("meta", {}).get("count", 0), "results": data.get("results", [])}
+    return r.json()
+
+def unique_works(results: List[Dict], seen: set) -> List[Dict]:
+    # concurrent page windows can shift while the index updates; keep the first copy of each work id
+    out = []
+    for w in results or []:
+        wid = w.get("id")
+        if wid and wid in seen: continue
+        if wid: seen.add(wid)
+        out.append(w)
+    return out
+
+async def iter_cursor(params: Dict, headers: Dict, target_count: int, ip: str = "", cursor: str = "*",
+                      progress: Optional[Dict] = None, max_hops: Optional[int] = 20) -> AsyncIterator[List[Dict]]:
+    # progress["next_cursor"] always names the page still to fetch, so a failed pull can resume from it
+    params = dict(params, cursor=cursor or "*")
+    progress = progress if progress is not None else {}
+    progress["next_cursor"] = params["cursor"]
+    sent = hops = 0
+    while sent < target_count and (max_hops is None or hops < max_hops):
+        j = await openalex_page(params, headers, ip, max_wait=QUOTA_MAX_WAIT if not sent else None)
+        batch = (j.get("results") or [])[:target_count - sent]
+        sent += len(batch)
+        nxt = (j.get("meta") or {}).get("next_cursor")
+        progress["next_cursor"] = nxt
+        progress["count"] = (j.get("meta") or {}).get("count", 0)
+        yield batch
+        if not nxt: break
+        params["cursor"] = nxt
+        hops += 1
+
+async def iter_pages(params: Dict, headers: Dict, target_count: int, ip: str = "") -> AsyncIterator[List[Dict]]:
+    first = await openalex_page(dict(params, page=1), headers, ip)
+    total = min(target_count, PAGE_MODE_MAX, (first.get("meta") or {}).get("count", 0) or 0)
+    last, nxt = math.ceil(total / BULK_PER_PAGE), 2
+    pending: deque = deque()  # at most BULK_FANOUT pages in flight, consumed in page order
+    def top_up():
+        nonlocal nxt
+        while len(pending) < BULK_FANOUT and nxt <= last:
+            pending.append(asyncio.create_task(openalex_page(dict(params, page=nxt), headers, ip, max_wait=None)))
+            nxt += 1
+    seen: set = set()
+    sent = 0
+    try:
+        top_up()
+        j = first
+        while True:
+            batch = unique_works(j.get("results"), seen)[:target_count - sent]
+            sent += len(batch)
+            yield batch
+            if not pending or sent >= target_count: break
+            j = await pending.popleft()
+            top_up()
+    finally:
+        for t in pending: t.cancel()
+
+def partial_info(err: Exception, progress: Dict) -> Dict:
+    # an upstream failure mid-pull keeps what was fetched and says where to resume (cursor mode)
+    if isinstance(err, httpx.HTTPStatusError): msg = f"Upstream HTTP {err.response.status_code}"
+    elif isinstance(err, HTTPException): msg = str(err.detail)
+    else: msg = f"Upstream {type(err).__name__}"
+    info = {"partial": True, "error": msg}
+    if progress.get("next_cursor"): info["next_cursor"] = progress["next_cursor"]
+    return info
+
+async def collect(pages: AsyncIterator[List[Dict]], progress: Dict) -> tuple:
+    out: List[Dict] = []
+    try:
+        async for batch in pages: out.extend(batch)
+    except (httpx.HTTPError, HTTPException) as e:
+        if not out: raise
+        return out, partial_info(e, progress)
+    return out, {}
+
+async def prime(pages: AsyncIterator[List[Dict]]) -> List[Dict]:
+    # fetch the first page before any response is built, so quota sheds (429 + Retry-After) and upstream
+    # errors still reach the client as a real status instead of a 200 whose body is only an error
+    try:
+        return await pages.__anext__()
+    except StopAsyncIteration:
+        return []
+    except httpx.HTTPStatusError as e:
+        code = e.response.status_code
+        headers = {"Retry-After": e.response.headers["retry-after"]} if "retry-after" in e.response.headers else None
+        raise HTTPException(code if code < 500 else 502, f"Upstream HTTP {code}", headers=headers)
+    except httpx.TransportError as e:
+        raise HTTPException(502, f"Upstream {type(e).__name__}")
+
+async def ndjson_lines(pages: AsyncIterator[List[Dict]], progress: Dict, first: List[Dict]) -> AsyncIterator[str]:
+    # one work per line, flushed page by page so the first records leave before the last hop;
+    # a failure after the primed first page went out ends the stream with a {"partial": true, ...} trailer line
+    if first: yield "".join(json.dumps(w, ensure_ascii=False) + "\n" for w in first)
+    try:
+        async for batch in pages:
+            if batch: yield "".join(json.dumps(w, ensure_ascii=False) + "\n" for w in batch)
+    except (httpx.HTTPError, HTTPException) as e:
+        yield json.dumps(partial_info(e, progress)) + "\n"
 
-# --------- Bulk search up to 2000 (cursor pagination) ----------
 @APP.get("/v1/search_bulk")
-def search_bulk(
+async def search_bulk(
     q: str = Query(..., min_length=1),
-    target_count: int = Query(2000, ge=1, le=2000),
+    target_count: int = Query(2000, ge=1, le=PAGE_MODE_MAX),
+    mode: str = Query("cursor", pattern="^(cursor|pages)$"),
+    stream: bool = False,
+    fields: str | None = None,
+    cursor: str = "*",
     request: Request = None,
     user_mailto: str | None = None,
 ):
+    if mode == "cursor" and target_count > BULK_CURSOR_MAX:
+        raise HTTPException(422, f"target_count above {BULK_CURSOR_MAX} requires mode=pages.")
     ip = ip_from_request(request)
-    params = {"search": q, "per_page": 200, "cursor": "*"}
-    selected_mailto = ""
-    if user_mailto and looks_like_email(user_mailto):
-        selected_mailto = user_mailto.strip()
-    else:
-        if free_allowed(ip):
-            selected_mailto = pick_owner_mailto(ip)
-            mark_free_used(ip)
+    params = {"search": q, "per_page": BULK_PER_PAGE}
+    select = select_param(fields)
+    if select: params["select"] = select
+    selected_mailto = await bulk_mailto(ip, user_mailto)
+    if selected_mailto: params["mailto"] = selected_mailto
+
+    headers = mailto_headers(selected_mailto)
+    progress: Dict = {}
+    if mode == "pages": pages = iter_pages(params, headers, target_count, ip)
+    else: pages = iter_cursor(params, headers, target_count, ip, cursor=cursor, progress=progress)
+    if stream:
+        first = await prime(pages)
+        return StreamingResponse(ndjson_lines(pages, progress, first), media_type="application/x-ndjson",
+                                 headers={"X-Mailto-Used": selected_mailto})
+    out, partial = await collect(pages, progress)
+    return {"mailto_used": selected_mailto, "results": out, **partial}
+
+# --------- Bulk export jobs (background cursor walk, checkpointed to disk, resumable after a crash) ----------
+# <id>.ndjson holds the records; <id>.json is the checkpoint (next_cursor, fetched, bytes) rewritten atomically
+# after every page, so a restart truncates the NDJSON back to the last checkpoint and carries on from there.
+JOBS_DIR = os.getenv("JOBS_DIR", "jobs")
+HARVEST_MAX = int(os.getenv("HARVEST_MAX_RECORDS", "500000"))  # harvest jobs lift the 2000 bulk ceiling
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RETRIES = int(os.getenv("JOB_RETRIES", "5"))
+JOB_TTL_SEC = float(os.getenv("JOB_TTL_SEC", str(24*3600)))  # finished/failed jobs and their records are deleted after this
+JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+JOB_FILES = ("json", "ndjson", "json.tmp", "lock")
+JOB_ACTIVE = ("queued", "running")
+_JOB_TASKS: Dict[str, asyncio.Task] = {}
+_JOB_GATE: Optional[asyncio.Semaphore] = None
+
+def _job_path(job_id: str, ext: str) -> str: return os.path.join(JOBS_DIR, f"{job_id}.{ext}")
+
+def load_job(job_id: str) -> Optional[Dict]:
+    if not JOB_ID_RE.match(job_id or ""): return None
+    try:
+        with open(_job_path(job_id, "json"), "r", encoding="utf-8") as f: return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def save_job(job: Dict):
+    job["updated"] = time.time()
+    tmp = _job_path(job["id"], "json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f: json.dump(job, f)
+    os.replace(tmp, _job_path(job["id"], "json"))
+
+def job_view(job: Dict) -> Dict:
+    out = {k: job.get(k) for k in ("id", "kind", "status", "q", "target_count", "upstream_count", "fetched", "bytes",
+                                   "records_per_s", "bytes_per_s", "error", "created", "updated")}
+    expected = min(job["target_count"], job.get("upstream_count") or job["target_count"])
+    done = job["status"] == "done" or not expected
+    out["progress"] = 1.0 if done else round(min(1.0, job["fetched"] / expected), 4)
+    rate = job.get("records_per_s") or 0
+    out["eta_s"] = round((expected - job["fetched"]) / rate) if rate and not done else None
+    return out
+
+def acquire_lease(job_id: str):
+    # exclusive per-job lease across uvicorn workers: a flock on <id>.lock, released by the kernel when the
+    # holder closes it or dies, so a crashed worker never leaves a stale lease behind
+    f = open(_job_path(job_id, "lock"), "a")
+    if fcntl is None: return f  # no flock (Windows): only the in-process _JOB_TASKS guard applies
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+def lease_held(job_id: str) -> bool:
+    lease = acquire_lease(job_id)
+    if lease is None: return True
+    lease.close()
+    return False
+
+def _open_records(job: Dict):
+    path = _job_path(job["id"], "ndjson")
+    f = open(path, "r+b" if os.path.exists(path) else "wb")
+    f.truncate(job["bytes"])  # anything past the checkpoint came from a page that was never committed
+    f.seek(job["bytes"])
+    return f
+
+async def run_job(job_id: str):
+    global _JOB_GATE
+    if _JOB_GATE is None: _JOB_GATE = asyncio.Semaphore(JOB_WORKERS)
+    async with _JOB_GATE:
+        lease = acquire_lease(job_id)
+        if lease is None: return  # another worker holds this job
+        with lease:
+            job = load_job(job_id)
+            if not job or job["status"] not in JOB_ACTIVE: return
+            job["status"], attempts = "running", 0
+            save_job(job)
+            # throughput covers the current run only, so a resumed job does not count time spent down
+            run_start, run_records, run_bytes = time.monotonic(), job["fetched"], job["bytes"]
+            try:
+                with _open_records(job) as f:
+                    while job["status"] == "running":
+                        if job["fetched"] >= job["target_count"] or not job["next_cursor"]:
+                            job["status"] = "done"
+                            break
+                        progress: Dict = {}
+                        try:
+                            async for batch in iter_cursor(job["params"], mailto_headers(job["params"].get("mailto", "")),
+                                                           job["target_count"] - job["fetched"], job["ip"],
+                                                           cursor=job["next_cursor"], progress=progress, max_hops=None):
+                                f.write("".join(json.dumps(w, ensure_ascii=False) + "\n" for w in batch).encode("utf-8"))
+                                f.flush(); os.fsync(f.fileno())
+                                job.update(fetched=job["fetched"] + len(batch), bytes=f.tell(), next_cursor=progress.get("next_cursor"),
+                                           upstream_count=progress.get("count"))
+                                elapsed = max(1e-6, time.monotonic() - run_start)
+                                job["records_per_s"] = round((job["fetched"] - run_records) / elapsed, 1)
+                                job["bytes_per_s"] = round((job["bytes"] - run_bytes) / elapsed, 1)
+                                save_job(job)
+                                attempts = 0
+                            job["next_cursor"] = progress.get("next_cursor")
+                            if job["next_cursor"] and job["fetched"] < job["target_count"]: continue
+                            job["status"], job["error"] = "done", None
+                        except (httpx.HTTPError, HTTPException) as e:
+                            attempts += 1
+                            job["error"] = partial_info(e, progress)["error"]
+                            if attempts > JOB_RETRIES: job["status"] = "failed"
+                            else:
+                                save_job(job)
+                                await asyncio.sleep(min(60.0, HTTP_BACKOFF * 2 ** attempts))
+            except Exception as e:  # a page that is not JSON, a full disk: fail the job rather than leave it "running"
+                job["status"], job["error"] = "failed", f"{type(e).__name__}: {e}"[:300]
+            save_job(job)
+
+def delete_job_files(job_id: str):
+    for ext in JOB_FILES:
+        try: os.unlink(_job_path(job_id, ext))
+        except FileNotFoundError: pass
+
+def sweep_jobs() -> int:
+    # retention: drop done/failed jobs older than JOB_TTL_SEC, and files whose checkpoint is gone;
+    # the lease keeps the sweep off a job another worker has just resumed
+    if not os.path.isdir(JOBS_DIR): return 0
+    now, n = time.time(), 0
+    for job_id in {name.split(".", 1)[0] for name in os.listdir(JOBS_DIR)}:
+        if not JOB_ID_RE.match(job_id): continue
+        job = load_job(job_id)
+        if job is not None:
+            if job["status"] in JOB_ACTIVE or job.get("updated", now) > now - JOB_TTL_SEC: continue
         else:
-            raise HTTPException(428, "Email required after first success.")
+            try:
+                if os.path.getmtime(_job_path(job_id, "ndjson")) > now - JOB_TTL_SEC: continue
+            except OSError:
+                pass
+        lease = acquire_lease(job_id)
+        if lease is None: continue
+        with lease: delete_job_files(job_id)
+        n += 1
+    return n
+
+def start_job(job_id: str):
+    task = _JOB_TASKS.get(job_id)
+    if task is not None and not task.done(): return
+    task = _JOB_TASKS[job_id] = asyncio.create_task(run_job(job_id))
+    task.add_done_callback(lambda _t, k=job_id: _JOB_TASKS.pop(k, None))
+
+def resume_jobs():
+    # called at startup: pick up jobs a crash or redeploy interrupted
+    if not os.path.isdir(JOBS_DIR): return
+    for name in os.listdir(JOBS_DIR):
+        if not name.endswith(".json"): continue
+        job = load_job(name[:-5])
+        if job and job["status"] in JOB_ACTIVE: start_job(job["id"])
+
+async def create_job(request: Request, kind: str, q: str, target_count: int, fields: Optional[str], user_mailto: Optional[str]) -> Dict:
+    ip = ip_from_request(request)
+    params = {"search": q, "per_page": BULK_PER_PAGE}
+    select = select_param(fields)
+    if select: params["select"] = select
+    selected_mailto = await bulk_mailto(ip, user_mailto)
     if selected_mailto: params["mailto"] = selected_mailto
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    job = {"id": uuid.uuid4().hex, "kind": kind, "status": "queued", "q": q, "params": params, "ip": ip,
+           "target_count": target_count, "upstream_count": None, "fetched": 0, "bytes": 0, "next_cursor": "*",
+           "records_per_s": 0.0, "bytes_per_s": 0.0, "error": None, "created": time.time()}
+    save_job(job)
+    start_job(job["id"])
+    return dict(job_view(job), mailto_used=selected_mailto)
 
-    headers = {"User-Agent": f"{UA} ({'mailto:'+selected_mailto if selected_mailto else 'no-mailto'})"}
-    out: List[Dict] = []
-    hops = 0
-    while len(out) < target_count and hops < 20:
-        r = requests.get(OPENALEX_BASE, params=params, headers=headers, timeout=TIMEOUT)
-        r.raise_for_status()
-        j = r.json()
-        out.extend(j.get("results", []))
-        nxt = (j.get("meta") or {}).get("next_cursor")
-        if not nxt: break
-        params["cursor"] = nxt
-        hops += 1
+@APP.post("/v1/jobs/bulk")
+async def create_bulk_job(
+    q: str = Form(..., min_length=1),
+    target_count: int = Form(2000, ge=1, le=BULK_CURSOR_MAX),
+    fields: Optional[str] = Form(None),
+    user_mailto: Optional[str] = Form(None),
+    request: Request = None,
+):
+    return await create_job(request, "bulk", q, target_count, fields, user_mailto)
+
+@APP.post("/v1/jobs/harvest")
+async def create_harvest_job(
+    q: str = Form(..., min_length=1),
+    target_count: Optional[int] = Form(None, ge=1, le=HARVEST_MAX),
+    fields: Optional[str] = Form("export"),
+    user_mailto: Optional[str] = Form(None),
+    request: Request = None,
+):
+    # full result sets for bibliometric studies: same disk-spilling cursor walk, no 2000 ceiling
+    return await create_job(request, "harvest", q, target_count or HARVEST_MAX, fields, user_mailto)
+
+@APP.get("/v1/jobs/{job_id}")
+def get_bulk_job(job_id: str):
+    job = load_job(job_id)
+    if not job: raise HTTPException(404, "Unknown job")
+    return job_view(job)
+
+@APP.post("/v1/jobs/{job_id}/resume")
+async def resume_bulk_job(job_id: str):
+    job = load_job(job_id)
+    if not job: raise HTTPException(404, "Unknown job")
+    if job["status"] == "running" and lease_held(job_id): return job_view(job)  # a runner (maybe another worker) has it
+    if job["status"] == "failed":
+        job["status"], job["error"] = "queued", None
+        save_job(job)
+    if job["status"] in JOB_ACTIVE: start_job(job_id)
+    return job_view(job)
+
+@APP.delete("/v1/jobs/{job_id}")
+async def delete_bulk_job(job_id: str):
+    job = load_job(job_id)
+    if not job: raise HTTPException(404, "Unknown job")
+    task = _JOB_TASKS.get(job_id)
+    if task is not None and not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    lease = acquire_lease(job_id)
+    if lease is None: raise HTTPException(409, "Job is running on another worker; retry shortly.")
+    with lease: delete_job_files(job_id)
+    return {"id": job_id, "deleted": True}
+
+@APP.get("/v1/jobs/{job_id}/results")
+def bulk_job_results(job_id: str):
+    # serves records up to the last checkpoint, so it is safe to read while the job is still running
+    job = load_job(job_id)
+    if not job: raise HTTPException(404, "Unknown job")
+    def chunks():
+        left = job["bytes"]
+        if not left: return
+        with open(_job_path(job_id, "ndjson"), "rb") as f:
+            while left > 0:
+                block = f.read(min(1 << 16, left))
+                if not block: break
+                left -= len(block)
+                yield block
+    return StreamingResponse(chunks(), media_type="application/x-ndjson",
+                             headers={"X-Job-Status": job["status"], "X-Job-Fetched": str(job["fetched"])})
+
+# --------- Server-side export (built straight from upstream pages; the UI only proxies the download) ----------
+# text formats stream page by page; xlsx/parquet need the whole file before the first byte, so they
+# spill to a temp file that is deleted once sent
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ris": ("application/x-research-info-systems", "ris"),
+    "bibtex": ("application/x-bibtex", "bib"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+EXPORT_FORMAT_RE = "^(xlsx|csv|parquet|ris|bibtex)$"
+EXPORT_TEXT = {"csv": csv_chunk, "ris": ris_chunk, "bibtex": bibtex_chunk}
+EXPORT_SINKS = {"xlsx": XlsxSink, "parquet": ParquetSink}
+
+def export_path(format: str) -> str:
+    fd, path = tempfile.mkstemp(suffix="." + EXPORT_FORMATS[format][1]); os.close(fd)
+    return path
+
+def file_response(path: str, format: str, headers: Dict) -> FileResponse:
+    return FileResponse(path, media_type=EXPORT_FORMATS[format][0], headers=headers, background=BackgroundTask(os.unlink, path))
+
+async def export_file(pages: AsyncIterator[List[Dict]], progress: Dict, format: str, headers: Dict) -> FileResponse:
+    # sink writes are CPU-bound (xlsx cells, arrow tables): they run in a worker thread, page by page
+    path, sent = export_path(format), False
+    try:
+        sink, partial = EXPORT_SINKS[format](path), {}
+        try:
+            async for batch in pages: await asyncio.to_thread(sink.write, [work_row(w) for w in batch])
+        except (httpx.HTTPError, HTTPException) as e:
+            if not sink.n: raise
+            partial = partial_info(e, progress)
+        headers["X-Export-Count"] = str(await asyncio.to_thread(sink.close))
+        if partial:
+            headers["X-Export-Partial"] = partial["error"]
+            if partial.get("next_cursor"): headers["X-Next-Cursor"] = partial["next_cursor"]
+        sent = True
+        return file_response(path, format, headers)
+    finally:
+        if not sent: os.unlink(path)
+
+def check_format(format: str):
+    if format == "parquet":
+        try: import pyarrow  # noqa: F401
+        except ImportError: raise HTTPException(501, "Parquet export needs pyarrow on the server.")
+
+async def export_response(pages: AsyncIterator[List[Dict]], progress: Dict, format: str, headers: Dict):
+    if format in EXPORT_SINKS: return await export_file(pages, progress, format, headers)
+    chunk = EXPORT_TEXT[format]
+    first = await prime(pages)
+    async def body():
+        # once the headers are out a later upstream failure can only end the stream early;
+        # use xlsx/parquet (X-Export-Partial) or a harvest job when completeness must be checked
+        yield ("\ufeff" + csv_chunk(first, header=True)) if format == "csv" else chunk(first)
+        try:
+            async for batch in pages:
+                if batch: yield chunk(batch)
+        except (httpx.HTTPError, HTTPException):
+            return
+    return StreamingResponse(body(), media_type=EXPORT_FORMATS[format][0], headers=headers)
+
+def export_headers(format: str, **extra) -> Dict:
+    return {"Content-Disposition": f'attachment; filename="export.{EXPORT_FORMATS[format][1]}"', **extra}
+
+@APP.get("/v1/export")
+async def export(
+    q: str = Query(..., min_length=1),
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT_RE),
+    target_count: int = Query(2000, ge=1, le=HARVEST_MAX),
+    request: Request = None,
+    user_mailto: str | None = None,
+):
+    check_format(format)
+    ip = ip_from_request(request)
+    params = {"search": q, "per_page": BULK_PER_PAGE, "select": FIELD_VIEWS["export"]}
+    selected_mailto = await bulk_mailto(ip, user_mailto)
+    if selected_mailto: params["mailto"] = selected_mailto
+    progress: Dict = {}
+    pages = iter_cursor(params, mailto_headers(selected_mailto), target_count, ip, progress=progress, max_hops=None)
+    return await export_response(pages, progress, format, export_headers(format, **{"X-Mailto-Used": selected_mailto}))
+
+def job_records(job: Dict) -> Iterator[List[Dict]]:
+    # the job's NDJSON up to its last checkpoint, in BULK_PER_PAGE batches; blocking, so only read off the loop
+    left, batch = job["bytes"], []
+    if not left: return
+    with open(_job_path(job["id"], "ndjson"), "rb") as f:
+        for line in f:
+            left -= len(line)
+            if left < 0: break
+            batch.append(json.loads(line))
+            if len(batch) == BULK_PER_PAGE:
+                yield batch
+                batch = []
+    if batch: yield batch
+
+def write_job_file(job: Dict, format: str, path: str) -> int:
+    sink = EXPORT_SINKS[format](path)
+    for batch in job_records(job): sink.write(work_row(w) for w in batch)
+    return sink.close()
 
-    return {"mailto_used": selected_mailto, "results": out[:target_count]}
+@APP.get("/v1/jobs/{job_id}/export")
+async def bulk_job_export(job_id: str, format: str = Query("xlsx", pattern=EXPORT_FORMAT_RE)):
+    # the file is built here from the job's records, so the UI only passes the download through
+    job = load_job(job_id)
+    if not job: raise HTTPException(404, "Unknown job")
+    check_format(format)
+    headers = export_headers(format, **{"X-Job-Status": job["status"]})
+    if job["status"] != "done": headers["X-Export-Partial"] = f"Job {job['status']}"
+    if format in EXPORT_TEXT:  # a sync iterator: Starlette pulls it in its threadpool
+        chunk = EXPORT_TEXT[format]
+        def body():
+            if format == "csv": yield "\ufeff" + csv_chunk([], header=True)
+            for batch in job_records(job): yield chunk(batch)
+        return StreamingResponse(body(), media_type=EXPORT_FORMATS[format][0], headers=headers)
+    # a harvest job can hold HARVEST_MAX records: the whole file is built in a worker thread
+    path, sent = export_path(format), False
+    try:
+        headers["X-Export-Count"] = str(await asyncio.to_thread(write_job_file, job, format, path))
+        sent = True
+        return file_response(path, format, headers)
+    finally:
+        if not sent: os.unlink(path)
 
 # --------- Bank flow (OTP -> masked reveal -> upload proof) ----------
 @APP.post("/bank/reveal")
@@ -210,7 +1331,7 @@ def bank_reveal(email: str = Form(...), otp: Optional[str] = Form(None), respons
     now = time.time()
     if not otp:
         code = str(int(now) % 1000000).zfill(6)
-        OTP_STORE[email] = {"code": code, "exp": now + 600}
+        OTP_STORE.set(email, {"code": code, "exp": now + OTP_TTL_SEC}, OTP_TTL_SEC)
         return {"status":"OTP_SENT","hint":"Check your email for a 6-digit code."}
     rec = OTP_STORE.get(email)
     if not rec or now > rec["exp"] or otp != rec["code"]: raise HTTPException(400, "Invalid or expired OTP")
@@ -257,7 +1378,7 @@ def owner_init(email: str = Form(...)):
     e = email.strip().lower()
     if e not in OWNER_EMAILS: raise HTTPException(403, "Not allowed")
     code = str(int(time.time()) % 1000000).zfill(6)
-    OTP_STORE["owner:"+e] = {"code": code, "exp": time.time() + 600}
+    OTP_STORE.set("owner:"+e, {"code": code, "exp": time.time() + OTP_TTL_SEC}, OTP_TTL_SEC)
     return {"status":"OTP_SENT"}
 
 @APP.post("/owner/verify")
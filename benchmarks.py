@@ -0,0 +1,287 @@
+# benchmarks.py  (local micro-benchmarks + equivalence checks; no network, no streamlit)
+# Run: python benchmarks.py            -> every benchmark
+#      python benchmarks.py journals   -> only the named ones
+import io, re, sys, time, random, pickle, tracemalloc
+import pandas as pd
+import local_search
+import difflib
+from journal_ranking import NameIndex, parse_rank_frame
+
+def timed(fn, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter(); out = fn(*args); best = min(best, time.perf_counter() - t)
+    return best, out
+
+def report(label, old, new):
+    print(f"  {label:<28} legacy {old*1000:9.1f} ms   new {new*1000:9.1f} ms   x{old/new:5.1f}")
+
+# ---------- Synthetic OpenAlex works ----------
+VOCAB = ("learning model data network graph protein cell market policy energy climate student "
+         "teacher health analysis method results study effect المعلم التعليم الطلاب الصحة البيانات").split()
+
+def fake_abstract(rnd, n_words):
+    inv = {}
+    for pos in range(n_words): inv.setdefault(rnd.choice(VOCAB) + str(rnd.randrange(40)), []).append(pos)
+    return inv
+
+def fake_abstract_works(n, words=180, seed=11):
+    rnd = random.Random(seed)
+    return [{"id": f"https://openalex.org/W{i}", "title": f"{rnd.choice(VOCAB)} {rnd.choice(VOCAB)} study {i}",
+             "abstract_inverted_index": fake_abstract(rnd, words) if i % 10 else None} for i in range(n)]
+
+# ---------- Local filters: legacy archive helpers vs local_search ----------
+def legacy_reconstruct_abstract(inv_index):
+    if not inv_index or not isinstance(inv_index, dict):
+        return ""
+    pos_to_word = {}
+    max_pos = -1
+    for word, positions in inv_index.items():
+        for p in positions:
+            pos_to_word[p] = word
+            max_pos = max(max_pos, p)
+    return " ".join(pos_to_word.get(i, "") for i in range(max_pos+1)).strip() if max_pos >= 0 else ""
+
+def legacy_tokenize(text):
+    if not text: return []
+    return [t for t in re.split(r'[\s,;:،؛]+', text.strip()) if t]
+
+def legacy_apply_exclude(items, none_words):
+    if not none_words:
+        return items
+    excl = [x.strip().lower() for x in re.split(r'[,\s]+', none_words) if x.strip()]
+    if not excl:
+        return items
+    filtered = []
+    for w in items:
+        title = (w.get("title") or "").lower()
+        abstract = legacy_reconstruct_abstract(w.get("abstract_inverted_index") or {}).lower()
+        if any(x and ((x in title) or (x in abstract)) for x in excl):
+            continue
+        filtered.append(w)
+    return filtered
+
+def legacy_apply_require(items, q, exact_phrase, any_words, enabled=True):
+    if not enabled:
+        return items
+    req_tokens = []
+    if q: req_tokens.extend(legacy_tokenize(q))
+    if exact_phrase: req_tokens.append(exact_phrase.strip())
+    any_list = [w.strip() for w in any_words.split(",") if w.strip()] if any_words else []
+    out = []
+    for w in items:
+        text = ((w.get("title") or "") + " " +
+                legacy_reconstruct_abstract(w.get("abstract_inverted_index") or ""))
+        t = text.lower()
+        ok_all = all(tok.lower() in t for tok in req_tokens) if req_tokens else True
+        ok_any = any((aw.lower() in t) for aw in any_list) if any_list else True
+        if ok_all and ok_any:
+            out.append(w)
+    return out
+
+FILTER_QUERY = dict(none_words="energy3, policy7", q="Learning data", exact_phrase="", any_words="graph1, المعلم2, cell5")
+
+def legacy_filters(works, f=FILTER_QUERY):
+    return legacy_apply_require(legacy_apply_exclude(works, f["none_words"]), f["q"], f["exact_phrase"], f["any_words"])
+
+# local_search matches folded text against folded terms, light-stemmed unless excluded; fed the same keys, the legacy
+# filters must keep exactly the same works
+def folded_works(works):
+    out = []
+    for w in works:
+        inv = {}
+        for word, positions in (w.get("abstract_inverted_index") or {}).items():
+            inv.setdefault(local_search.fold(word), []).extend(positions)
+        out.append({**w, "title": local_search.fold(w.get("title") or ""), "abstract_inverted_index": inv or None})
+    return out
+
+def folded_query(f):
+    key = lambda v: re.sub(r'[^\s,;:،؛]+', lambda m: local_search.term_key(m.group()), v)
+    return dict(q=key(f["q"]), exact_phrase=local_search.fold(f["exact_phrase"]), any_words=key(f["any_words"]),
+                none_words=local_search.fold(f["none_words"]))
+
+def same_as_legacy(works, f=FILTER_QUERY):
+    return [w["id"] for w in legacy_filters(folded_works(works), folded_query(f))] == [w["id"] for w in new_filters(works, f)]
+
+def new_filters(works, f=FILTER_QUERY):
+    return local_search.apply_local_filters(works, f["q"], f["exact_phrase"], f["any_words"], f["none_words"])
+
+def cold_filters(works):
+    local_search._TEXTS.clear()
+    return new_filters(works)
+
+def bench_abstracts():
+    print("abstract reconstruction + exclude/require")
+    works = fake_abstract_works(500)
+    for w in works:
+        inv = w["abstract_inverted_index"]
+        assert local_search.reconstruct_abstract(inv) == legacy_reconstruct_abstract(inv)
+    old, _ = timed(lambda: [legacy_reconstruct_abstract(w["abstract_inverted_index"]) for w in works])
+    new, _ = timed(lambda: [local_search.reconstruct_abstract(w["abstract_inverted_index"]) for w in works])
+    report("reconstruct x500", old, new)
+    old, a = timed(legacy_filters, works)
+    new, b = timed(cold_filters, works)
+    assert same_as_legacy(works), "local_search filters disagree with the legacy ones"
+    report(f"filters cold ({len(a)} kept)", old, new)
+    new, _ = timed(new_filters, works)
+    report("filters warm (rerun)", old, new)
+
+def random_query(rnd, n_req, n_any, n_excl):
+    pick = lambda k: [rnd.choice(VOCAB)[:rnd.randint(3, 6)] + rnd.choice(["", str(rnd.randrange(40))]) for _ in range(k)]
+    return dict(q=" ".join(pick(n_req)), exact_phrase="", any_words=", ".join(pick(n_any)), none_words=", ".join(pick(n_excl)))
+
+def bench_matcher():
+    print("compiled term matcher")
+    rnd = random.Random(3)
+    for n, terms in ((500, (2, 3, 2)), (5000, (2, 3, 2)), (5000, (4, 8, 8))):
+        works = fake_abstract_works(n)
+        queries = [random_query(rnd, *terms) for _ in range(20)]
+        for f in queries:  # plain `in` semantics on folded keys, overlapping and nested terms included
+            assert same_as_legacy(works, f), f
+        old, _ = timed(lambda: [legacy_filters(works, f) for f in queries], repeat=2)
+        new, _ = timed(lambda: [new_filters(works, f) for f in queries], repeat=2)
+        report(f"{n} works, {sum(terms)} terms x20", old, new)
+
+# ---------- BM25 re-ranking over a fetched batch ----------
+def bench_bm25():
+    print("BM25 local index (title + abstract)")
+    for n in (500, 5000):
+        works = fake_abstract_works(n)
+        for w in works: local_search.work_texts(w)  # page already filtered: abstracts are cached
+        build, idx = timed(local_search.BM25Index, works)
+        first, _ = timed(lambda: local_search.BM25Index(works).rank("learning3 data7 المعلم2", 2.0))
+        reweight, _ = timed(idx.rank, "learning3 data7 المعلم2", 4.0)
+        print(f"  {n:>5} docs  build {build*1000:7.1f} ms   build + first rank {first*1000:7.1f} ms   "
+              f"re-rank (new weight) {reweight*1000:6.2f} ms")
+
+# ---------- Arabic normalization + light stemming ----------
+AR_VARIANTS = ("الكتاب كتاب كتب مكتبة المكتبات", "أحمد إحمد احمد", "المدرسة مدرسه المدارس", "الطُّلَّاب طلاب للطلاب",
+               "الإسلامية اسلامي", "مُعَلِّمُون المعلمين معلم")
+
+def fake_mixed_works(n, seed=5):
+    rnd = random.Random(seed)
+    ar = " ".join(AR_VARIANTS).split()
+    return [{"id": f"https://openalex.org/W{i}", "title": f"{rnd.choice(ar)} {rnd.choice(VOCAB)} {rnd.choice(ar)}",
+             "abstract_inverted_index": {word: [pos] for pos, word in enumerate(rnd.choice(ar + list(VOCAB)) + str(rnd.randrange(3))
+                                                                               for _ in range(120))}} for i in range(n)]
+
+def bench_arabic():
+    print("Arabic normalization + light stemming (mixed Arabic/English)")
+    works = fake_mixed_works(5000)
+    text = " ".join(w["title"] + " " + " ".join(w["abstract_inverted_index"]) for w in works)
+    tokens = local_search.WORD_RE.findall(text)
+    fold, _ = timed(local_search.fold, text)
+    local_search.term_key.cache_clear()
+    cold, _ = timed(lambda: [local_search.term_key(t) for t in tokens], repeat=1)
+    warm, _ = timed(lambda: [local_search.term_key(t) for t in tokens])
+    print(f"  fold {len(text)/1e6:5.1f} M chars         {fold*1000:7.1f} ms")
+    print(f"  term_key {len(tokens)} tokens    cold {cold*1000:7.1f} ms ({len(tokens)/cold/1e6:4.1f} M/s)   "
+          f"cached {warm*1000:7.1f} ms ({len(tokens)/warm/1e6:4.1f} M/s)")
+    for f in (dict(q="الكتاب", exact_phrase="", any_words="", none_words=""),
+              dict(q="أحمد", exact_phrase="", any_words="المدرسة, الطلاب", none_words="")):
+        local_search._TEXTS.clear()
+        raw = len(legacy_filters(works, f)); new, kept = timed(new_filters, works, f)
+        assert same_as_legacy(works, f), f
+        print(f"  q={f['q']!r:<10} any={f['any_words']!r:<20} raw substring {raw:5d} kept   normalized {len(kept):5d} kept   "
+              f"{new*1000:6.1f} ms")
+
+# ---------- Journal ranking: difflib over every name vs the trigram NameIndex ----------
+SYLLABLES = "ba ce di fo gu ha ke li mo nu pa re si to vu wa xe yo za tri pro chem bio geo neu cardi onco".split()
+STOPWORDS = "journal of and the international review research".split()
+
+def fake_journal_names(n, seed=2):
+    rnd = random.Random(seed)
+    words = ["".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4))) for _ in range(4000)]
+    names = set()
+    while len(names) < n:
+        names.add(" ".join(rnd.choice(STOPWORDS if rnd.random() < 0.4 else words) for _ in range(rnd.randint(2, 6)))
+                  + ("" if rnd.random() < 0.5 else f" {rnd.randrange(100)}"))
+    return sorted(names)
+
+def venue_queries(names, k, seed=4):
+    rnd = random.Random(seed)
+    typo = lambda s, i: s[:i] + rnd.choice("abcxyz ") + s[i + 1:]
+    qs = [typo(x, rnd.randrange(len(x))) for x in rnd.sample(names, k)]   # near misses (the fuzzy path)
+    qs += [x + "s" for x in rnd.sample(names, k // 4)] + [x[:-2] for x in rnd.sample(names, k // 4)]
+    return qs + ["nature", "the lancet", "j. appl. phys.", "مجلة العلوم التربوية", "a", ""]
+
+def bench_journals():
+    print("journal ranking fuzzy lookup (cutoff 0.9)")
+    for n in (3000, 30000):
+        names = fake_journal_names(n)
+        qs = venue_queries(names, 40)
+        old, a = timed(lambda: [(difflib.get_close_matches(q, names, n=1, cutoff=0.9) or [None])[0] for q in qs], repeat=1)
+        build, idx = timed(NameIndex, names, repeat=1)
+        new, b = timed(lambda: [idx.close_match(q) for q in qs], repeat=1)
+        assert a == b, [(q, x, y) for q, x, y in zip(qs, a, b) if x != y]
+        memo, _ = timed(lambda: [idx.close_match(q) for q in qs])
+        print(f"  {n:>5} names  build {build*1000:6.1f} ms   per venue: difflib {old/len(qs)*1000:6.2f} ms   "
+              f"index {new/len(qs)*1000:5.2f} ms   memoized {memo/len(qs)*1e6:5.1f} us   ({sum(x is not None for x in a)} matched)")
+
+# ---------- Ranking CSV loader: iterrows (legacy ranked page) vs column-wise parse_rank_frame ----------
+def legacy_parse_rank(df):
+    def _norm_issn(s): return re.sub(r'[^0-9Xx]', '', (s or ''))
+    def _split_multi_issn(cell):
+        if not cell: return []
+        parts = re.split(r'[,\;\|]', str(cell))
+        return [_norm_issn(p) for p in parts if _norm_issn(p)]
+    cols = {c.lower():c for c in df.columns}
+    jcol = cols.get("journal") or cols.get("title") or list(df.columns)[0]
+    icol = cols.get("issn") or cols.get("issns") or None
+    qcol = cols.get("quartile") or cols.get("q") or None
+    scol = cols.get("sjr") or None
+    icol2= cols.get("impactfactor") or cols.get("if") or cols.get("jif") or None
+    ucol = cols.get("sourceurl") or cols.get("url") or None
+    by_issn = {}
+    by_name = {}
+    for _, row in df.iterrows():
+        name = str(row.get(jcol, "")).strip()
+        entry = {
+            "Journal": name or "",
+            "Quartile": str(row.get(qcol, "") if qcol else ""),
+            "SJR": str(row.get(scol, "") if scol else ""),
+            "ImpactFactor": str(row.get(icol2, "") if icol2 else ""),
+            "SourceURL": str(row.get(ucol, "") if ucol else ""),
+        }
+        if icol:
+            for issn in _split_multi_issn(row.get(icol)):
+                by_issn[issn] = entry
+        if name:
+            by_name[(name or "").strip().lower()] = entry
+    return by_issn, by_name
+
+def fake_rank_csv(n, seed=6):
+    rnd = random.Random(seed)
+    names = fake_journal_names(n)
+    issn = lambda: f"{rnd.randrange(10**4):04d}-{rnd.randrange(10**3):03d}{rnd.choice('0123456789X')}"
+    lines = ["Title,Issn,SJR,SJR Best Quartile,Quartile,Country,URL"]
+    for i, name in enumerate(names):
+        issns = "; ".join(issn() for _ in range(rnd.randint(0, 2)))
+        sjr = f"{rnd.random()*5:.3f}" if i % 11 else ""
+        lines.append(f'"{name.title() if i % 50 else name + "  "}","{issns}",{sjr},Q{rnd.randint(1, 4)},Q{rnd.randint(1, 4)},'
+                     f'{rnd.choice(["Egypt", "United States", "Saudi Arabia"])},https://www.scimagojr.com/journalsearch.php?q={i}')
+    return "\n".join(lines).encode()
+
+def retained(fn, *args):
+    tracemalloc.start(); out = fn(*args); size = tracemalloc.get_traced_memory()[0]; tracemalloc.stop()
+    return size, out
+
+def bench_rankcsv():
+    print("ranking CSV loader (by_issn / by_name)")
+    for n in (3000, 30000):
+        df = pd.read_csv(io.BytesIO(fake_rank_csv(n)))
+        old, a = timed(legacy_parse_rank, df, repeat=1)
+        new, b = timed(parse_rank_frame, df)
+        for x, y in zip(a, b):  # same keys in the same order, same field values
+            assert [(k, v) for k, v in x.items()] == [(k, v._asdict()) for k, v in y.items()], "rank maps differ"
+        report(f"{n} rows", old, new)
+        (mem_old, _), (mem_new, _) = retained(legacy_parse_rank, df), retained(parse_rank_frame, df)
+        print(f"  {'':<28} memory {mem_old/2**20:7.1f} MB   new {mem_new/2**20:7.1f} MB   "
+              f"pickled (st.cache_data) {len(pickle.dumps(a))/2**20:5.1f} MB -> {len(pickle.dumps(b))/2**20:5.1f} MB")
+
+BENCHES = {"abstracts": bench_abstracts, "matcher": bench_matcher, "bm25": bench_bm25, "arabic": bench_arabic,
+           "journals": bench_journals, "rankcsv": bench_rankcsv}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHES:
+        BENCHES[name]()
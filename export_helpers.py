@@ -0,0 +1,106 @@
+# export_helpers.py  (no streamlit import: shared by the UI and the backend)
+import io, csv, json
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+EXPORT_COLUMNS = ("Title", "Year", "Venue", "DOI")
+XLSX_MAX_ROWS = 1048576 - 1  # per sheet, minus the header row
+
+def work_row(w: Dict) -> Tuple:
+    title = w.get("title") or w.get("display_name") or ""
+    doi = w.get("doi","")
+    year = (w.get("publication_year") or "")
+    venue = ((w.get("primary_location") or {}).get("source") or {}).get("display_name","")
+    return (title, year, venue, doi)
+
+def iter_ndjson(lines: Iterable) -> Iterator[Dict]:
+    for line in lines:
+        if line: yield json.loads(line)
+
+def bare_doi(doi: str) -> str:
+    return (doi or "").replace("https://doi.org/", "")
+
+# ---------- Incremental file sinks (write page by page, close once) ----------
+class XlsxSink:
+    # constant_memory flushes each row to a temp file as soon as the next one starts,
+    # so memory stays flat no matter how many rows come through
+    def __init__(self, path: str, columns=EXPORT_COLUMNS, sheet: str = "Sheet1"):
+        import xlsxwriter
+        self.wb = xlsxwriter.Workbook(path, {"constant_memory": True, "strings_to_urls": False})
+        self.bold = self.wb.add_format({"bold": True})
+        self.columns, self.sheet = columns, sheet
+        self.ws, self.r, self.n = None, 0, 0
+
+    def write(self, rows: Iterable[Tuple]):
+        for row in rows:
+            if self.ws is None or self.r > XLSX_MAX_ROWS: self._new_sheet()
+            self.ws.write_row(self.r, 0, row); self.r += 1; self.n += 1
+
+    def _new_sheet(self):
+        name = self.sheet if self.ws is None else f"{self.sheet} ({self.n // XLSX_MAX_ROWS + 1})"
+        self.ws = self.wb.add_worksheet(name)
+        self.ws.write_row(0, 0, self.columns, self.bold); self.r = 1
+
+    def close(self) -> int:
+        if self.ws is None: self._new_sheet()
+        self.wb.close()
+        return self.n
+
+class ParquetSink:
+    # one row group per written batch; needs the optional pyarrow package
+    def __init__(self, path: str):
+        import pyarrow as pa, pyarrow.parquet as pq
+        self.pa = pa
+        self.schema = pa.schema([("Title", pa.string()), ("Year", pa.int64()), ("Venue", pa.string()), ("DOI", pa.string())])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.n = 0
+
+    def write(self, rows: Iterable[Tuple]):
+        rows = list(rows)
+        if not rows: return
+        title, year, venue, doi = zip(*rows)
+        year = [y if isinstance(y, int) else None for y in year]
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(title), self.pa.array(year, self.pa.int64()), self.pa.array(venue), self.pa.array(doi)],
+            schema=self.schema))
+        self.n += len(rows)
+
+    def close(self) -> int:
+        self.writer.close()
+        return self.n
+
+# ---------- Text formats (one chunk per page of works) ----------
+def csv_chunk(works: List[Dict], header: bool = False) -> str:
+    buf = io.StringIO(); wr = csv.writer(buf)
+    if header: wr.writerow(EXPORT_COLUMNS)
+    wr.writerows(work_row(w) for w in works)
+    return buf.getvalue()
+
+def ris_chunk(works: List[Dict]) -> str:
+    out = []
+    for w in works:
+        title, year, venue, doi = work_row(w)
+        rec = ["TY  - JOUR", f"TI  - {title}"]
+        if year: rec.append(f"PY  - {year}")
+        if venue: rec.append(f"JO  - {venue}")
+        if doi: rec.append(f"DO  - {bare_doi(doi)}")
+        rec.append("ER  - \n")
+        out.append("\n".join(rec) + "\n")
+    return "".join(out)
+
+BIB_ESCAPES = str.maketrans({"\\": "\\textbackslash{}", "{": "\\{", "}": "\\}"})
+
+def _bib(v) -> str:
+    # one pass, so the braces of \textbackslash{} are not escaped again
+    return str(v).translate(BIB_ESCAPES)
+
+def bibtex_chunk(works: List[Dict]) -> str:
+    out = []
+    for w in works:
+        title, year, venue, doi = work_row(w)
+        key = (w.get("id") or "").rsplit("/", 1)[-1] or bare_doi(doi).replace("/", "_") or "work"
+        fields = [f"  title = {{{_bib(title)}}}"]
+        if year: fields.append(f"  year = {{{year}}}")
+        if venue: fields.append(f"  journal = {{{_bib(venue)}}}")
+        if doi: fields.append(f"  doi = {{{_bib(bare_doi(doi))}}}")
+        out.append(f"@article{{{key},\n" + ",\n".join(fields) + "\n}\n\n")
+    return "".join(out)
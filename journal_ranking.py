@@ -0,0 +1,119 @@
+# journal_ranking.py  (journal-ranking CSV loading + lookups; no streamlit import, shared by the ranked search page)
+import difflib, threading
+from collections import Counter, defaultdict, namedtuple
+from typing import Dict, List, Optional, Tuple
+
+RANK_FIELDS = ("Journal", "Quartile", "SJR", "ImpactFactor", "SourceURL")
+FUZZY_CUTOFF = 0.9  # difflib.get_close_matches cutoff used by the ranked page
+GRAM = 3
+MATCH_CACHE_MAX = 20000  # venue names; a results page repeats the same journals on every rerun
+_MISS = object()
+
+class RankEntry(namedtuple("RankEntry", RANK_FIELDS)):
+    # one shared tuple per CSV row instead of a dict; keeps the dict reads the page does (entry.get / entry["SJR"])
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        return getattr(self, key) if isinstance(key, str) else tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+def _text(col):
+    # str(cell) per cell, as the row-wise loader did: missing cells read "nan", numbers keep their repr
+    return col.astype(str).fillna("nan")
+
+def _shared(col) -> list:
+    # equal strings become one object (Quartile / URL prefixes repeat across thousands of rows)
+    codes, uniques = col.factorize()
+    return uniques.astype(object).take(codes).tolist()
+
+def parse_rank_frame(df) -> Tuple[Dict[str, RankEntry], Dict[str, RankEntry]]:
+    # column-wise equivalent of walking df.iterrows(): later rows win on duplicate ISSNs / names, keys keep
+    # their first-seen order, and a row's ISSN and name keys point at the same entry
+    import pandas as pd
+    df = df.reset_index(drop=True)  # row labels = row positions, so exploded ISSNs map straight back to entries
+    cols = {c.lower(): c for c in df.columns}
+    jcol = cols.get("journal") or cols.get("title") or list(df.columns)[0]
+    icol = cols.get("issn") or cols.get("issns") or None
+    qcol = cols.get("quartile") or cols.get("q") or None
+    scol = cols.get("sjr") or None
+    icol2 = cols.get("impactfactor") or cols.get("if") or cols.get("jif") or None
+    ucol = cols.get("sourceurl") or cols.get("url") or None
+
+    n = len(df)
+    names = _text(df[jcol]).str.strip()
+    blank = pd.Series([""] * n, index=df.index, dtype=object)
+    fields = [names] + [_text(df[c]) if c else blank for c in (qcol, scol, icol2, ucol)]
+    entries = list(map(RankEntry, *(_shared(f) for f in fields)))
+
+    by_issn: Dict[str, RankEntry] = {}
+    if icol:
+        cell = _text(df[icol])
+        if pd.api.types.is_numeric_dtype(df[icol]): cell = cell.mask(df[icol] == 0, "")  # a falsy cell had no ISSNs
+        issns = (cell.str.split(r'[,;|]', regex=True).explode()
+                 .str.replace(r'[^0-9Xx]', '', regex=True))
+        issns = issns[issns != ""]
+        by_issn = dict(zip(issns.tolist(), map(entries.__getitem__, issns.index.tolist())))
+
+    keep = (names != "").tolist()
+    by_name = dict((k, e) for k, e, ok in zip(names.str.lower().tolist(), entries, keep) if ok)
+    return by_issn, by_name
+
+def _grams(s: str) -> Dict[str, int]:
+    out: Dict[str, int] = defaultdict(int)
+    for i in range(len(s) - GRAM + 1): out[s[i:i + GRAM]] += 1
+    return out
+
+class NameIndex:
+    # same answer as difflib.get_close_matches(name, names, n=1, cutoff) without scoring every name:
+    # ratio >= cutoff bounds the candidate length (real_quick_ratio) and the indel distance d <= (1-cutoff)*T,
+    # and by the q-gram lemma such a pair shares >= len(name) - GRAM + 1 - GRAM*d trigrams: a postings-based
+    # count filter, and only its survivors are scored
+    def __init__(self, names, cutoff: float = FUZZY_CUTOFF):
+        self.names: List[str] = list(names)
+        self.cutoff = cutoff
+        self.by_len: Dict[int, List[int]] = defaultdict(list)
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self.lens = [len(name) for name in self.names]
+        for i, name in enumerate(self.names):
+            self.by_len[len(name)].append(i)
+            for g in _grams(name): self.postings[g].append(i)
+        self._memo: Dict[str, Optional[str]] = {}
+        self._memo_lock = threading.Lock()  # one index is shared by every Streamlit session thread
+
+    def _candidates(self, name: str):
+        la = len(name)
+        band = [lb for lb in self.by_len if 2.0 * min(la, lb) / ((la + lb) or 1) >= self.cutoff]
+        need = {lb: la - GRAM + 1 - GRAM * int((1 - self.cutoff) * (la + lb) + 1e-9) for lb in band}
+        scan = [lb for lb in band if need[lb] <= 0]  # too short or too loose for the trigram filter to prune
+        for lb in scan: yield from self.by_len[lb]
+        if len(scan) == len(band): return
+        # shared trigrams counted in C (Counter.update over postings); a gram repeated in the query counts its postings
+        # that many times, which can only overcount, so the filter never drops a true match
+        shared: Counter = Counter()
+        for g, c in _grams(name).items():
+            post = self.postings.get(g)
+            if post:
+                for _ in range(c): shared.update(post)
+        lens = self.lens
+        for i, n in shared.items():
+            m = need.get(lens[i], 0)
+            if m > 0 and n >= m: yield i
+
+    def close_match(self, name: str) -> Optional[str]:
+        hit = self._memo.get(name, _MISS)  # single lookup: a clear() from another thread is just a miss
+        if hit is not _MISS: return hit
+        s = difflib.SequenceMatcher()
+        s.set_seq2(name)
+        best = None
+        for i in self._candidates(name):
+            x = self.names[i]
+            s.set_seq1(x)
+            if s.real_quick_ratio() >= self.cutoff and s.quick_ratio() >= self.cutoff and s.ratio() >= self.cutoff:
+                best = max(best, (s.ratio(), x)) if best else (s.ratio(), x)  # difflib's tie-break: larger name wins
+        hit = best[1] if best else None
+        with self._memo_lock:
+            if len(self._memo) >= MATCH_CACHE_MAX: self._memo.clear()
+            self._memo[name] = hit
+        return hit
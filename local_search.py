@@ -0,0 +1,208 @@
+# local_search.py  (local filtering + ranking over fetched OpenAlex works; no streamlit import, shared by the search pages)
+import re, math, threading
+from collections import OrderedDict, Counter
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+TEXT_CACHE_MAX = 20000  # works; one search page re-filters the same ids on every rerun
+_TEXTS: "OrderedDict[tuple, Tuple[str, str, str]]" = OrderedDict()
+_TEXTS_LOCK = threading.Lock()  # Streamlit runs each session's script in its own thread
+TOKEN_SPLIT = re.compile(r'[\s,;:،؛]+')
+WORD_RE = re.compile(r'\w+')  # index terms: letters/digits in any script, Arabic included
+
+# ---------- Arabic-aware normalization + light stemming (shared by the filters and the BM25 index) ----------
+TERM_CACHE_MAX = 50000  # distinct tokens; queries and abstract vocabularies repeat heavily across pages
+# drop harakat/tanween/dagger alef and tatweel, then fold alef-hamza forms, alef maqsura and taa marbuta;
+# one regex pass + C-level replaces beat str.translate ~3x on Arabic text, pure ASCII skips both
+_AR_MARKS = re.compile(r'[\u064B-\u0652\u0670\u0640]')
+_AR_FOLDS = (("أ", "ا"), ("إ", "ا"), ("آ", "ا"), ("ٱ", "ا"), ("ى", "ي"), ("ة", "ه"))
+_AR = re.compile(r'[\u0621-\u064A]')
+AR_PREFIX = re.compile(r'^(?:وال|بال|كال|فال|لل|ال)(?=\w{3})')  # definite article (+ conjunction/preposition)
+AR_SUFFIXES = ("ها", "ان", "ات", "ون", "ين", "يه", "ه", "ي")  # light10 order, after ة -> ه folding
+AR_MIN_STEM = 3  # shorter stems turn substring matching into noise
+
+def fold(text: str) -> str:
+    text = text.lower()
+    if text.isascii(): return text
+    text = _AR_MARKS.sub("", text)
+    for a, b in _AR_FOLDS:
+        if a in text: text = text.replace(a, b)
+    return text
+
+def light_stem(token: str) -> str:
+    # light10-style: strip one article prefix, then each suffix once, never below AR_MIN_STEM letters;
+    # the stem is always a substring of the folded token, so substring matching only ever widens
+    # (used for required / any-of terms; excluded terms are only folded)
+    if not _AR.search(token): return token
+    token = AR_PREFIX.sub("", token)
+    for suf in AR_SUFFIXES:
+        if token.endswith(suf) and len(token) - len(suf) >= AR_MIN_STEM: token = token[:-len(suf)]
+    return token
+
+@lru_cache(maxsize=TERM_CACHE_MAX)
+def term_key(term: str) -> str:
+    # query terms and index tokens: folded, and stemmed when a single word (phrases stay exact after folding)
+    term = fold(term.strip())
+    return term if any(c.isspace() for c in term) else light_stem(term)
+
+def reconstruct_abstract(inv_index) -> str:
+    # OpenAlex ships abstracts as {word: [positions]}; fill a pre-sized slot list instead of a position dict
+    if not inv_index or not isinstance(inv_index, dict): return ""
+    spans = [p for p in inv_index.values() if p]
+    if not spans: return ""
+    words = [""] * (max(map(max, spans)) + 1)
+    for word, positions in inv_index.items():
+        for p in positions: words[p] = word
+    return " ".join(words).strip()
+
+def work_texts(w: Dict) -> Tuple[str, str, str]:
+    # (title, abstract, "title abstract"), all folded once per work id and shared by every filter;
+    # the key also carries the index size so a projected copy without the abstract never shadows the full one
+    inv = w.get("abstract_inverted_index")
+    key = (w.get("id"), len(inv) if isinstance(inv, dict) else 0)
+    if key[0]:
+        with _TEXTS_LOCK:
+            hit = _TEXTS.get(key)
+            if hit is not None:
+                _TEXTS.move_to_end(key)
+                return hit
+    title = w.get("title") or ""
+    abstract = reconstruct_abstract(inv)
+    title, abstract = fold(title), fold(abstract)
+    hit = (title, abstract, title + " " + abstract)
+    if key[0]:
+        with _TEXTS_LOCK:
+            _TEXTS[key] = hit
+            if len(_TEXTS) > TEXT_CACHE_MAX: _TEXTS.popitem(last=False)
+    return hit
+
+def tokenize(text) -> List[str]:
+    if not text: return []
+    return [t for t in TOKEN_SPLIT.split(text.strip()) if t]
+
+# ---------- Compiled term matcher (terms lowered + pruned once per query, each cached text scanned once) ----------
+def _prune(terms, keep_shortest: bool) -> tuple:
+    # "data" required is implied by "database" required; "protein" excluded is implied by "pro" excluded
+    terms = set(terms)
+    if keep_shortest: return tuple(t for t in terms if not any(u != t and u in t for u in terms))
+    return tuple(t for t in terms if not any(u != t and t in u for u in terms))
+
+class TermMatcher:
+    # same answers as one `in` test per term: implied terms are pruned once per query, then each text gets
+    # C substring scans, excluded terms first so a rejected work costs as few scans as possible
+    def __init__(self, required=(), any_of=(), excluded=()):
+        self.required, self.any_of, self.excluded = _prune(required, False), _prune(any_of, True), _prune(excluded, True)
+        self.empty = not (self.required or self.any_of or self.excluded)
+
+    def accepts(self, text: str) -> bool:
+        if self.empty: return True
+        return (not any(x in text for x in self.excluded) and all(x in text for x in self.required)
+                and (not self.any_of or any(x in text for x in self.any_of)))
+
+def exclude_terms(none_words, sep=r'[,\s]+') -> List[str]:
+    # folded only: stemming widens what a term matches, which widens what an excluded term drops
+    return [fold(x.strip()) for x in re.split(sep, none_words or "") if x.strip()]
+
+def require_terms(q, exact_phrase) -> List[str]:
+    req = [term_key(t) for t in tokenize(q)]
+    if exact_phrase and exact_phrase.strip(): req.append(fold(exact_phrase.strip()))
+    return req
+
+def any_terms(any_words) -> List[str]:
+    return [term_key(w) for w in (any_words or "").split(",") if w.strip()]
+
+def _filter(items, matcher: TermMatcher):
+    if matcher.empty: return items
+    return [w for w in items if matcher.accepts(work_texts(w)[2])]
+
+def apply_exclude(items, none_words, sep=r'[,\s]+'):
+    return _filter(items, TermMatcher(excluded=exclude_terms(none_words, sep)))
+
+def apply_require(items, q, exact_phrase, any_words, enabled=True):
+    if not enabled: return items
+    return _filter(items, TermMatcher(require_terms(q, exact_phrase), any_terms(any_words)))
+
+def apply_local_filters(items, q, exact_phrase, any_words, none_words, enabled=True):
+    # apply_exclude + apply_require in a single pass over each title+abstract
+    if not enabled: return apply_exclude(items, none_words)
+    return _filter(items, TermMatcher(require_terms(q, exact_phrase), any_terms(any_words), exclude_terms(none_words)))
+
+# ---------- BM25 re-ranking over a fetched batch (no OpenAlex round trip when terms or weights change) ----------
+BM25_K1, BM25_B = 1.2, 0.75
+INDEX_CACHE_MAX = 8  # batches; keyed by their work ids so every rerun of a page reuses its index
+_INDEXES: "OrderedDict[tuple, BM25Index]" = OrderedDict()
+_INDEXES_LOCK = threading.Lock()
+
+def analyze(text: str) -> List[str]:
+    return [term_key(t) for t in WORD_RE.findall(fold(text))]
+
+@lru_cache(maxsize=TERM_CACHE_MAX)
+def _word_keys(word: str) -> tuple:
+    return tuple(analyze(word))
+
+def _abstract_counts(inv) -> Counter:
+    # term frequencies straight from the inverted index: each distinct word is analyzed once, not once per position,
+    # and an abstract vocabulary word seen on an earlier work is not analyzed again
+    counts: Counter = Counter()
+    if isinstance(inv, dict):
+        for word, positions in inv.items():
+            for tok in _word_keys(word): counts[tok] += len(positions)
+    return counts
+
+class BM25Index:
+    # title and abstract keep separate term frequencies, so the title weight is a query-time knob (BM25F-style:
+    # tf = w*tf_title + tf_abstract, length = w*len_title + len_abstract); postings are built per query term
+    # on first use and kept, so the build is one counting pass and a re-rank touches only the query's terms
+    def __init__(self, works):
+        self.works = list(works)
+        self.tf_title = [Counter(map(term_key, WORD_RE.findall(work_texts(w)[0]))) for w in self.works]  # already folded
+        self.tf_abstract = [_abstract_counts(w.get("abstract_inverted_index")) for w in self.works]
+        self.len_title = [sum(c.values()) for c in self.tf_title]
+        self.len_abstract = [sum(c.values()) for c in self.tf_abstract]
+        self._postings: Dict[str, List[Tuple[int, int, int]]] = {}
+
+    def postings(self, term: str) -> List[Tuple[int, int, int]]:
+        post = self._postings.get(term)
+        if post is None:
+            post = self._postings[term] = [(i, ct[term], ca[term]) for i, (ct, ca) in enumerate(zip(self.tf_title, self.tf_abstract))
+                                           if term in ct or term in ca]
+        return post
+
+    def scores(self, terms, title_weight: float = 2.0, k1: float = BM25_K1, b: float = BM25_B) -> List[float]:
+        n = len(self.works)
+        out = [0.0] * n
+        if not n: return out
+        dl = [title_weight * lt + la for lt, la in zip(self.len_title, self.len_abstract)]
+        avgdl = (sum(dl) / n) or 1.0
+        norm = [k1 * (1 - b + b * d / avgdl) for d in dl]
+        for term in set(terms):
+            post = self.postings(term)
+            if not post: continue
+            idf = math.log(1 + (n - len(post) + 0.5) / (len(post) + 0.5))
+            for i, ft, fa in post:
+                tf = title_weight * ft + fa
+                out[i] += idf * tf * (k1 + 1) / (tf + norm[i])
+        return out
+
+    def rank(self, query: str, title_weight: float = 2.0) -> list:
+        s = self.scores(analyze(query), title_weight)
+        return [self.works[i] for i in sorted(range(len(s)), key=lambda i: -s[i])]  # ties keep OpenAlex order
+
+def bm25_index(works) -> BM25Index:
+    key = tuple(w.get("id") for w in works)
+    if not all(key): return BM25Index(works)
+    with _INDEXES_LOCK:
+        idx = _INDEXES.get(key)
+        if idx is not None:
+            _INDEXES.move_to_end(key)
+            return idx
+    idx = BM25Index(works)  # built outside the lock; two sessions racing on one batch both build, the first kept wins
+    with _INDEXES_LOCK:
+        idx = _INDEXES.setdefault(key, idx)
+        _INDEXES.move_to_end(key)
+        if len(_INDEXES) > INDEX_CACHE_MAX: _INDEXES.popitem(last=False)
+    return idx
+
+def bm25_rank(works, query: str, title_weight: float = 2.0) -> list:
+    if not works or not analyze(query or ""): return works
+    return bm25_index(works).rank(query, title_weight)
@@ -0,0 +1,65 @@
+# tests/conftest.py  (backend fixtures and helpers: no network, upstream answered by an httpx MockTransport)
+import os, sys, time, types, asyncio
+import httpx, pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("RESOLVE_CACHE_DB", "")  # keep the on-disk cache out of the working tree
+import backend_main as B
+
+@pytest.fixture
+def backend(monkeypatch, tmp_path):
+    # fresh per-loop globals (limiters, semaphores) and generous quotas; every test runs its own asyncio.run
+    monkeypatch.setattr(B, "_AHTTP", None)
+    monkeypatch.setattr(B, "_HOST_LIMITS", {})
+    monkeypatch.setattr(B, "_JOB_GATE", None)
+    monkeypatch.setattr(B, "_JOB_TASKS", {})
+    monkeypatch.setattr(B, "JOBS_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(B, "HTTP_BACKOFF", 0.0)
+    for name in ("MAILTO_RPS", "MAILTO_BURST", "CLIENT_RPS", "CLIENT_BURST"): monkeypatch.setattr(B, name, 1000.0)
+    monkeypatch.setattr(B, "QUOTA", B.QuotaManager())
+    return B
+
+@pytest.fixture
+def upstream(backend, monkeypatch):
+    # upstream(handler) routes every outbound call through handler(request) -> httpx.Response (sync or async)
+    calls = []
+    def install(handler):
+        async def route(request: httpx.Request):
+            calls.append(request)
+            out = handler(request)
+            return await out if asyncio.iscoroutine(out) else out
+        monkeypatch.setattr(B, "_AHTTP", httpx.AsyncClient(transport=httpx.MockTransport(route)))
+        return calls
+    return install
+
+def openalex_handler(total: int, per_page: int = 200, pages: dict = None):
+    # cursor and page= pagination over works W0..W{total-1}; pages can override a page number's id list
+    def handler(request: httpx.Request):
+        p = request.url.params
+        if "page" in p:
+            n = int(p["page"])
+            ids = (pages or {}).get(n, range((n - 1) * per_page, min(total, n * per_page)))
+            return httpx.Response(200, json={"meta": {"count": total}, "results": [{"id": f"W{i}"} for i in ids]})
+        start = 0 if p.get("cursor", "*") == "*" else int(p["cursor"])
+        end = min(total, start + per_page)
+        return httpx.Response(200, json={"meta": {"count": total, "next_cursor": str(end) if end < total else None},
+                                         "results": [{"id": f"W{i}"} for i in range(start, end)]})
+    return handler
+
+HEADERS = {"User-Agent": "test"}
+CLIENT = types.SimpleNamespace(headers={}, client=None)  # stands in for the Request the endpoints read the IP from
+
+def collect_ids(pages) -> list:
+    async def go():
+        out = []
+        async for batch in pages: out.extend(w["id"] for w in batch)
+        return out
+    return asyncio.run(go())
+
+def make_job(job_id="a" * 32, **kw) -> dict:
+    B.os.makedirs(B.JOBS_DIR, exist_ok=True)
+    job = {"id": job_id, "kind": "bulk", "status": "running", "q": "x", "params": {"search": "x", "per_page": 200},
+           "ip": "", "target_count": 500, "upstream_count": 500, "fetched": 0, "bytes": 0, "next_cursor": "*",
+           "records_per_s": 0.0, "bytes_per_s": 0.0, "error": None, "created": time.time(), **kw}
+    B.save_job(job)
+    return job
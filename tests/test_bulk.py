@@ -0,0 +1,61 @@
+# tests/test_bulk.py  (/v1/search_bulk: page prefetch, cursor walks, NDJSON streaming, per-host backpressure)
+import json, asyncio
+import httpx, pytest
+from fastapi import HTTPException
+from conftest import B, CLIENT, HEADERS, collect_ids, openalex_handler
+
+def test_iter_pages_keeps_page_order_and_drops_duplicates(upstream):
+    # page 3 overlaps page 2 (index shifted between calls) and later pages answer first
+    base = openalex_handler(800, pages={3: list(range(390, 600))})
+    async def handler(request):
+        await asyncio.sleep(0.01 * (5 - int(request.url.params["page"])))
+        return base(request)
+    upstream(handler)
+    ids = collect_ids(B.iter_pages({"search": "x", "per_page": 200}, HEADERS, 800))
+    assert ids == [f"W{i}" for i in range(800)]
+
+def test_iter_cursor_follows_next_cursor(upstream):
+    calls = upstream(openalex_handler(450))
+    progress = {}
+    ids = collect_ids(B.iter_cursor({"search": "x", "per_page": 200}, HEADERS, 1000, progress=progress))
+    assert ids == [f"W{i}" for i in range(450)] and len(calls) == 3
+    assert progress == {"next_cursor": None, "count": 450}
+
+def bulk_stream(**kw):
+    async def go():
+        resp = await B.search_bulk(q="x", target_count=1000, mode="cursor", stream=True, fields=None, cursor="*",
+                                   request=CLIENT, user_mailto="a@b.org", **kw)
+        return [line async for line in resp.body_iterator]
+    return asyncio.run(go())
+
+def test_stream_first_page_upstream_error_is_not_a_200(upstream):
+    upstream(lambda request: httpx.Response(400, json={"error": "bad select"}))
+    with pytest.raises(HTTPException) as e: bulk_stream()
+    assert e.value.status_code == 400
+
+def test_stream_first_page_quota_shed_keeps_retry_after(upstream, monkeypatch):
+    upstream(openalex_handler(450))
+    monkeypatch.setattr(B, "MAILTO_RPS", 0.01); monkeypatch.setattr(B, "MAILTO_BURST", 0.0)
+    with pytest.raises(HTTPException) as e: bulk_stream()
+    assert e.value.status_code == 429 and "Retry-After" in e.value.headers
+
+def test_stream_later_failure_ends_with_partial_trailer(upstream):
+    ok = openalex_handler(450)
+    upstream(lambda request: ok(request) if request.url.params["cursor"] == "*" else httpx.Response(400))
+    chunks = bulk_stream()
+    lines = "".join(chunks).splitlines()
+    assert len(lines) == 201 and json.loads(lines[0]) == {"id": "W0"}
+    assert json.loads(lines[-1]) == {"partial": True, "error": "Upstream HTTP 400", "next_cursor": "200"}
+
+def test_aimd_halves_once_per_burst(upstream, monkeypatch):
+    monkeypatch.setattr(B, "HTTP_RETRIES", 0)
+    async def handler(request):
+        await asyncio.sleep(0.01)
+        return httpx.Response(429)
+    upstream(handler)
+    async def go():
+        await asyncio.gather(*(B.http_get("https://api.openalex.org/works") for _ in range(20)))
+        return B._HOST_LIMITS["api.openalex.org"]
+    limiter = asyncio.run(go())
+    assert limiter.counters["overloads"] == 20 and limiter.counters["decreases"] == 1
+    assert limiter.limit == B.HTTP_POOL_PER_HOST / 2
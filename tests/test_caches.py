@@ -0,0 +1,21 @@
+# tests/test_caches.py  (TTLCache: in-memory LRU + TTL, optional SQLite tier)
+from conftest import B
+
+def test_ttl_cache_lru_and_expiry():
+    c = B.TTLCache("t", max_entries=2, ttl=60)
+    c.set("a", 1); c.set("b", 2); c.get("a"); c.set("c", 3)  # "b" is least recently used
+    assert (c.get("a"), c.get("b"), c.get("c")) == (1, None, 3)
+    c.set("d", 4, ttl=-1)
+    assert c.get("d") is None and c.counters["expired"] == 1
+
+def test_ttl_cache_disk_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    B.TTLCache("r", 10, 60, path).set("k", {"v": 1})  # no event loop: written through
+    again = B.TTLCache("r", 10, 60, path)
+    assert again.get("k") == {"v": 1} and again.counters["disk_hits"] == 1
+    assert B.TTLCache("other", 10, 60, path).get("k") is None
+
+def test_ttl_cache_disk_errors_are_misses(tmp_path):
+    c = B.TTLCache("t", 10, 60, str(tmp_path / "missing" / "cache.db"))
+    c.set("k", 1); c._mem.clear()
+    assert c.get("k") is None and c.counters["disk_errors"] >= 1
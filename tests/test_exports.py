@@ -0,0 +1,9 @@
+# tests/test_exports.py  (export_helpers text formats)
+from export_helpers import _bib, bibtex_chunk
+
+def test_bib_escapes_backslash_and_braces_once():
+    assert _bib("a\\b{c}") == "a\\textbackslash{}b\\{c\\}"
+
+def test_bibtex_chunk_fields():
+    w = {"id": "https://openalex.org/W1", "title": "Set {A}", "publication_year": 2020, "doi": "https://doi.org/10.1/x"}
+    assert bibtex_chunk([w]) == "@article{W1,\n  title = {Set \\{A\\}},\n  year = {2020},\n  doi = {10.1/x}\n}\n\n"
@@ -0,0 +1,85 @@
+# tests/test_jobs.py  (background bulk/harvest jobs: checkpoints, resume, lease, retention, export)
+import json, time, asyncio
+import httpx, pytest
+from fastapi import HTTPException
+from conftest import B, make_job, openalex_handler
+
+# ---------- Jobs: truncate back to the checkpoint, then resume from its cursor ----------
+def test_run_job_truncates_and_resumes(upstream, tmp_path):
+    upstream(openalex_handler(500))
+    job = make_job()
+    first = "".join(json.dumps({"id": f"W{i}"}) + "\n" for i in range(200)).encode()
+    with open(B._job_path(job["id"], "ndjson"), "wb") as f: f.write(first + b'{"id": "W200"}\n{"id": "W2')  # crash mid-page
+    job.update(fetched=200, bytes=len(first), next_cursor="200")
+    B.save_job(job)
+    asyncio.run(B.run_job(job["id"]))
+    done = B.load_job(job["id"])
+    with open(B._job_path(job["id"], "ndjson"), "rb") as f: ids = [json.loads(line)["id"] for line in f]
+    assert done["status"] == "done" and done["fetched"] == 500 and done["bytes"] == B.os.path.getsize(B._job_path(job["id"], "ndjson"))
+    assert ids == [f"W{i}" for i in range(500)]
+
+def test_run_job_marks_unexpected_errors_failed(upstream):
+    upstream(lambda request: httpx.Response(200, text="<html>maintenance</html>"))
+    job = make_job()
+    asyncio.run(B.run_job(job["id"]))
+    done = B.load_job(job["id"])
+    assert done["status"] == "failed" and done["error"].startswith("JSONDecodeError")
+
+def test_job_lease_keeps_a_second_runner_out(upstream):
+    calls = upstream(openalex_handler(500))
+    job = make_job()
+    lease = B.acquire_lease(job["id"])  # another worker is running it
+    async def go():
+        view = await B.resume_bulk_job(job["id"])
+        await B.run_job(job["id"])
+        return view
+    view = asyncio.run(go())
+    assert view["status"] == "running" and not calls and not B.os.path.exists(B._job_path(job["id"], "ndjson"))
+    lease.close()  # that worker died: the kernel drops its flock and the job can resume here
+    asyncio.run(B.run_job(job["id"]))
+    assert B.load_job(job["id"])["status"] == "done" and len(calls) == 3
+
+# ---------- Job retention ----------
+def test_sweep_jobs_drops_only_expired_finished_jobs(backend):
+    old = time.time() - 2 * B.JOB_TTL_SEC
+    for job_id, status in (("b" * 32, "done"), ("c" * 32, "failed"), ("d" * 32, "running"), ("e" * 32, "done")):
+        job = make_job(job_id, status=status)
+        open(B._job_path(job_id, "ndjson"), "w").close()
+        if job_id != "e" * 32:  # e was updated just now
+            with open(B._job_path(job_id, "json"), "w") as f: json.dump(dict(job, updated=old), f)
+    assert B.sweep_jobs() == 2
+    assert sorted(n.split(".")[0][0] for n in B.os.listdir(B.JOBS_DIR) if n.endswith(".json")) == ["d", "e"]
+    assert not B.os.path.exists(B._job_path("b" * 32, "ndjson"))
+
+def test_delete_job_endpoint(backend):
+    job = make_job(status="done")
+    assert asyncio.run(B.delete_bulk_job(job["id"])) == {"id": job["id"], "deleted": True}
+    assert B.os.listdir(B.JOBS_DIR) == []
+    with pytest.raises(HTTPException) as e: asyncio.run(B.delete_bulk_job(job["id"]))
+    assert e.value.status_code == 404
+
+# ---------- Job export: built on the backend from the checkpointed records ----------
+def test_job_export_reads_records_up_to_the_checkpoint(backend):
+    done = "".join(json.dumps({"id": f"W{i}", "display_name": f"T{i}"}) + "\n" for i in range(3)).encode()
+    job = make_job(status="running", fetched=3, bytes=len(done))
+    with open(B._job_path(job["id"], "ndjson"), "wb") as f: f.write(done + b'{"id": "W3"}\n')  # past the checkpoint
+    async def go():
+        resp = await B.bulk_job_export(job["id"], format="csv")
+        return resp, "".join([chunk async for chunk in resp.body_iterator])
+    resp, body = asyncio.run(go())
+    assert resp.headers["X-Job-Status"] == "running" and "X-Export-Partial" in resp.headers
+    assert [line.split(",")[0].strip('"') for line in body.lstrip("﻿").splitlines()[1:]] == ["T0", "T1", "T2"]
+    with pytest.raises(HTTPException) as e: asyncio.run(B.bulk_job_export("f" * 32, format="csv"))
+    assert e.value.status_code == 404
+
+def test_job_export_builds_xlsx_off_the_event_loop(backend, monkeypatch):
+    done = "".join(json.dumps({"id": f"W{i}"}) + "\n" for i in range(5)).encode()
+    job = make_job(status="done", fetched=5, bytes=len(done))
+    with open(B._job_path(job["id"], "ndjson"), "wb") as f: f.write(done)
+    threads = []
+    real = B.write_job_file
+    monkeypatch.setattr(B, "write_job_file", lambda *a: threads.append(B.threading.current_thread()) or real(*a))
+    resp = asyncio.run(B.bulk_job_export(job["id"], format="xlsx"))
+    assert resp.headers["X-Export-Count"] == "5" and "X-Export-Partial" not in resp.headers
+    assert threads and threads[0] is not B.threading.main_thread() and B.os.path.getsize(resp.path) > 0
+    B.os.unlink(resp.path)
@@ -0,0 +1,30 @@
+# tests/test_journal_ranking.py  (fuzzy venue lookup and ranking CSV loading, checked against the legacy code paths)
+import io, difflib
+import pandas as pd
+from benchmarks import fake_journal_names, venue_queries, fake_rank_csv, legacy_parse_rank
+from journal_ranking import NameIndex, parse_rank_frame
+
+def test_name_index_matches_difflib():
+    names = fake_journal_names(400) + ["ab", "abc", "abcd", "journal of x", "journal of y"]  # short names: scanned, not filtered
+    qs = venue_queries(names[:400], 60) + ["abd", "abcx", "journal of z", "journal of xy"]
+    idx = NameIndex(names)
+    expected = [(difflib.get_close_matches(q, names, n=1, cutoff=0.9) or [None])[0] for q in qs]
+    assert [idx.close_match(q) for q in qs] == expected
+    assert [idx.close_match(q) for q in qs] == expected  # memoized answers are the same
+    assert any(expected) and None in expected
+
+def same_maps(df):
+    # same keys in the same order and the same field values as the iterrows loader
+    for old, new in zip(legacy_parse_rank(df), parse_rank_frame(df)):
+        assert list(old.items()) == [(k, v._asdict()) for k, v in new.items()]
+
+def test_parse_rank_frame_matches_iterrows_loader():
+    same_maps(pd.read_csv(io.BytesIO(fake_rank_csv(300))))
+
+def test_parse_rank_frame_edge_cells():
+    # missing names and values, a duplicate name and ISSN (later row wins), numeric ISSNs with a falsy 0
+    same_maps(pd.DataFrame({"Journal": ["A", None, " a ", "B"], "ISSN": ["1234-5678", "1111-1111", "1234-5678; 2222-2222", None],
+                            "SJR": [1.5, None, 2, 3], "Q": ["Q1", "Q2", None, "Q4"]}, index=[5, 3, 9, 1]))
+    same_maps(pd.DataFrame({"title": ["X", "Y", "Z"], "issns": [12345678, 0, 87654321]}))
+    entry = parse_rank_frame(pd.DataFrame({"Journal": ["A"], "SJR": [1.5]}))[1]["a"]
+    assert entry["SJR"] == entry.get("SJR") == "1.5" and entry.get("missing", "-") == "-"
@@ -0,0 +1,37 @@
+# tests/test_local_search.py  (local filters, Arabic folding and stemming)
+import random
+import local_search as L
+from benchmarks import FILTER_QUERY, fake_abstract_works, legacy_reconstruct_abstract, random_query, same_as_legacy
+
+def ids(works): return [w["id"] for w in works]
+
+def test_required_terms_are_stemmed_but_excluded_terms_only_folded():
+    works = [{"id": "W1", "title": "كتاب جديد"}, {"id": "W2", "title": "الكتابة العربية"}, {"id": "W3", "title": "Teachers"}]
+    assert ids(L.apply_local_filters(works, "كتابة", "", "", "")) == ["W1", "W2"]
+    assert ids(L.apply_exclude(works, "الكتابة")) == ["W1", "W3"]  # not every work that mentions كتاب
+    assert ids(L.apply_exclude(works, "الكتابه, TEACHER")) == ["W1"]  # folded: ة/ه and case still match
+
+def test_term_matcher_prunes_implied_terms_without_changing_answers():
+    m = L.TermMatcher(required=["data", "database"], any_of=["pro", "protein"], excluded=["net", "network"])
+    assert (sorted(m.required), m.any_of, m.excluded) == (["database"], ("pro",), ("net",))
+    texts = ["database of proteins", "database of networks", "data only", "database programs", "database"]
+    plain = lambda t: "data" in t and "database" in t and ("pro" in t or "protein" in t) and not ("net" in t or "network" in t)
+    assert [m.accepts(t) for t in texts] == [plain(t) for t in texts] == [True, False, False, True, False]
+    assert L.TermMatcher().accepts("anything")
+
+def test_reconstruct_abstract_matches_legacy():
+    cases = [w["abstract_inverted_index"] for w in fake_abstract_works(50)]
+    cases += [None, {}, "not a dict", {"a": []}, {"gap": [0, 4], "x": [2]}, {"b": [1], "a": [0, 1]}]  # holes, shared slot
+    assert [L.reconstruct_abstract(c) for c in cases] == [legacy_reconstruct_abstract(c) for c in cases]
+
+def test_work_texts_key_keeps_projected_copies_apart():
+    full = {"id": "W9", "title": "T", "abstract_inverted_index": {"Body": [0]}}
+    assert L.work_texts({"id": "W9", "title": "T"})[1] == "" and L.work_texts(full)[1] == "body"
+
+def test_apply_local_filters_matches_legacy_filters():
+    # legacy exclude + require fed the same folded keys; random overlapping and nested terms, Arabic included
+    works, rnd = fake_abstract_works(60), random.Random(3)
+    queries = [FILTER_QUERY] + [random_query(rnd, *terms) for terms in [(1, 2, 1), (0, 3, 2), (1, 0, 3), (0, 0, 4), (1, 3, 2)] * 3]
+    assert [f for f in queries if not same_as_legacy(works, f)] == []
+    kept = {len(L.apply_local_filters(works, f["q"], f["exact_phrase"], f["any_words"], f["none_words"])) for f in queries}
+    assert 0 in kept and len(kept) > 5  # the queries keep anything from none to most of the works
@@ -0,0 +1,31 @@
+# tests/test_quota.py  (OpenAlex token buckets per mailto and client IP)
+import asyncio
+import pytest
+from fastapi import HTTPException
+from conftest import B, CLIENT
+
+def test_token_bucket_reserve_and_refund():
+    b = B.TokenBucket(rate=10, capacity=2)
+    assert b.reserve() == 0 and b.reserve() == 0
+    assert b.reserve() == pytest.approx(0.1, abs=0.02)
+    b.refund()
+    assert b.remaining() == pytest.approx(0, abs=0.05)
+
+def test_quota_sheds_with_retry_after(backend, monkeypatch):
+    monkeypatch.setattr(B, "CLIENT_RPS", 0.1); monkeypatch.setattr(B, "CLIENT_BURST", 1.0)
+    async def go():
+        await B.QUOTA.acquire("m@x.org", "1.2.3.4")
+        with pytest.raises(HTTPException) as e: await B.QUOTA.acquire("m@x.org", "1.2.3.4", max_wait=1)
+        return e.value
+    err = asyncio.run(go())
+    assert err.status_code == 429 and int(err.headers["Retry-After"]) >= 9
+    assert B.QUOTA.counters["shed"] == 1
+
+def test_quota_endpoints_run_on_the_event_loop(backend):
+    # QUOTA's buckets and OrderedDicts are only touched from the loop, so the read endpoints must not use the threadpool
+    assert asyncio.iscoroutinefunction(B.quota) and asyncio.iscoroutinefunction(B.stats)
+    async def go():
+        await B.QUOTA.acquire("m@x.org", "1.2.3.4")
+        return await B.quota(CLIENT, user_mailto="m@x.org"), await B.stats()
+    out, stats = asyncio.run(go())
+    assert out["mailto_remaining"] < B.MAILTO_BURST and "quota" in stats
@@ -0,0 +1,24 @@
+# tests/test_singleflight.py  (identical in-flight upstream calls are coalesced)
+import asyncio
+import httpx
+from conftest import B, CLIENT
+
+def test_singleflight_coalesces_identical_calls(backend):
+    flight, runs = B.SingleFlight("t"), []
+    async def factory():
+        runs.append(1); await asyncio.sleep(0.01); return {"ok": True}
+    async def go(): return await asyncio.gather(*(flight.do("k", factory) for _ in range(5)))
+    assert asyncio.run(go()) == [{"ok": True}] * 5
+    assert runs == [1] and flight.stats() == {"calls": 5, "upstream": 1, "coalesced": 4, "inflight": 0}
+
+def test_search_coalesces_upstream_calls(upstream):
+    async def slow(request):
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json={"meta": {"count": 1}, "results": [{"id": "W1"}]})
+    calls = upstream(slow)
+    B.SEARCH_CACHE._mem.clear()
+    async def go():
+        return await asyncio.gather(*(B.search(q="coalesce me", per_page=5, fields=None, user_mailto="a@b.org",
+                                               request=CLIENT, x_api_key=None) for _ in range(3)))
+    out = asyncio.run(go())
+    assert len(calls) == 1 and all(r["results"] == [{"id": "W1"}] for r in out)
@@ -0,0 +1,43 @@
+# tests/test_stores.py  (FREE_USED / OTP_STORE state stores: MemoryStore and RedisStore behave alike)
+import time, asyncio
+import pytest
+from conftest import B
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory": return B.MemoryStore("t")
+    fakeredis = pytest.importorskip("fakeredis")
+    return B.RedisStore("t", fakeredis.FakeRedis(decode_responses=True))
+
+def test_store_roundtrip_delete_and_expiry(store):
+    store.set("ip", {"code": "123456", "exp": 1.5}, ttl=60)
+    store.set("gone", 1, ttl=0.05)
+    assert store.get("ip") == {"code": "123456", "exp": 1.5}
+    store.delete("ip")
+    assert store.get("ip") is None and store.get("never") is None
+    time.sleep(0.1)
+    store.sweep()
+    assert store.get("gone") is None
+
+def test_store_async_api_matches_sync(store):
+    async def go():
+        await store.aset("ip", 1.5, ttl=60)
+        return await store.aget("ip"), await store.aget("never")
+    assert asyncio.run(go()) == (1.5, None) and store.get("ip") == 1.5
+
+def test_redis_store_calls_leave_the_event_loop():
+    fakeredis = pytest.importorskip("fakeredis")
+    client, threads = fakeredis.FakeRedis(decode_responses=True), []
+    real = client.get
+    client.get = lambda *a, **kw: threads.append(B.threading.current_thread()) or real(*a, **kw)
+    asyncio.run(B.RedisStore("t", client).aget("ip"))
+    assert threads and threads[0] is not B.threading.main_thread()
+
+def test_memory_store_sweep_and_cap():
+    s = B.MemoryStore("t", max_entries=3)
+    for i in range(3): s.set(f"k{i}", i, ttl=60 + i)
+    s.set("k0", 0, ttl=100)  # re-set: the stale heap pair must not evict it
+    s.set("k3", 3, ttl=200)  # over the cap: k1 expires soonest
+    assert s.get("k1") is None and [s.get(k) for k in ("k0", "k2", "k3")] == [0, 2, 3]
+    s.set("short", 1, ttl=-1)  # over the cap again: k2 goes, then the sweep drops the expired entry
+    assert s.sweep() == 1 and s.get("k2") is None and s.stats()["entries"] == 2